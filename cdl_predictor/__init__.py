@@ -0,0 +1,13 @@
+"""CDL Predictor
+
+A random forest model for predicting the winners of upcoming CDL matches, split into stages:
+
+* `data` loads the workbook, `streaming` aggregates raw match logs into the same team data, and `matchups` builds the differential features for every pair of teams
+* `training` fits the encoders and the model, `evaluation` and `plotting` check how well it does
+* `prediction`, `forest` and `bundle` load the trained model and predict series, and `ratings` keeps Elo and recent form ratings that can be added to the features
+* `simulation` turns map predictions into series odds and season projections, and `server` serves predictions over HTTP
+* `instrumentation` times every stage when turned on, and `benchmarks` times every stage on synthetic leagues and guards the import time
+* `utils` has the helpers they share: atomic file writes, running a script in a fresh interpreter and reading the resident memory
+
+The stages only import what they need, so loading the prediction code doesn't pull in sklearn, matplotlib or pandas.
+"""
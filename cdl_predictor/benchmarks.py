@@ -0,0 +1,184 @@
+"""Benchmarks
+
+`run_benchmark_suite` times every stage of the pipeline on synthetic workbooks shaped like `CDL Stats.xlsx`, at the league sizes in `BENCHMARK_SIZES`:
+
+* ingestion, reading the workbook from scratch and from the cache
+* building the matchups, training the model and 5-fold cross-validation
+* predicting a single series and a batch of 1000 series from the exported model bundle
+
+Each benchmark is run a few times after a warm-up run, and the min, median, mean and standard deviation are saved to a JSON file along with the commit and library versions, so `compare_benchmark_results` can flag regressions between two commits.
+
+`import cdl_predictor2_0` should also stay under `IMPORT_TIME_BUDGET_MS`. `check_import_time` imports it in a fresh interpreter with `python -X importtime`, reads the cumulative time of the import from the report, and lists any heavy library that got pulled in, since that is almost always why the budget was blown.
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .utils import PACKAGE_ROOT
+
+IMPORT_TIME_BUDGET_MS = 200
+HEAVY_MODULES = ['pandas', 'sklearn', 'matplotlib', 'seaborn', 'joblib', 'scipy']
+
+def measure_import_time(module='cdl_predictor2_0', repeats=5):
+    """ Return the best cumulative import time of module in ms over a few fresh interpreters, and the top level packages it imported. """
+    best_us, imported = None, set()
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=PACKAGE_ROOT,
+                                check=True, capture_output=True, text=True)
+        # Each line is "import time: self [us] | cumulative | imported package"
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+            imported.add(name.split('.')[0])
+            if name == module:
+                best_us = int(cumulative) if best_us is None else min(best_us, int(cumulative))
+    return best_us / 1000, imported
+
+def check_import_time(module='cdl_predictor2_0', budget_ms=IMPORT_TIME_BUDGET_MS):
+    """ Print the import time of module against the budget and return whether it is within it. """
+    import_ms, imported = measure_import_time(module)
+    heavy = [name for name in HEAVY_MODULES if name in imported]
+    print(f"import {module}: {import_ms:.1f} ms (budget {budget_ms} ms)")
+    if heavy:
+        print("Heavy modules imported:", ', '.join(heavy))
+    return import_ms <= budget_ms
+
+# League sizes the suite runs at: the real workbook's size and a bigger league covering a few seasons
+BENCHMARK_SIZES = {
+    'cdl': {'n_teams': 12, 'n_maps': 9, 'n_seasons': 1},
+    'large': {'n_teams': 48, 'n_maps': 15, 'n_seasons': 3},
+}
+RESULTS_DIR = '.benchmarks'
+
+def _time_runs(func, repeats, warmup=1):
+    """ Run func warmup times untimed, then repeats times timed. Returns the timing summary in seconds. """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'mean': statistics.fmean(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0, 'repeats': repeats}
+
+def _git_commit():
+    """ The checked out commit and whether the tree has uncommitted changes, or None outside a git checkout. """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PACKAGE_ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=PACKAGE_ROOT,
+                               check=True, capture_output=True, text=True).stdout.strip() != ''
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+def _environment():
+    import numpy
+    import pandas
+    import sklearn
+
+    commit, dirty = _git_commit()
+    return {'commit': commit, 'dirty': dirty, 'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'numpy': numpy.__version__, 'pandas': pandas.__version__, 'sklearn': sklearn.__version__}
+
+def _benchmark_size(size_name, params, tmp_dir, repeats, seed):
+    """ Time every stage on one synthetic league. Returns {benchmark name: timing summary} and the workload sizes. """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import cross_val_score
+
+    from .bundle import export_bundle, load_bundle
+    from .data import load_workbook, read_workbook_sheets, write_synthetic_workbook
+    from .matchups import build_matchup_frame
+    from .prediction import make_random_series, predict_series_batch
+    from .training import encode_matchups, fit_encoders, split_training_data
+
+    workbook_path = os.path.join(tmp_dir, f'{size_name}.xlsx')
+    team_data = write_synthetic_workbook(workbook_path, seed=seed, **params)
+    cache_dir = os.path.join(tmp_dir, f'{size_name}-cache')
+    matchup_df = build_matchup_frame(team_data)
+    encoders = fit_encoders(team_data['Team'].unique(), team_data['Map'].unique(), team_data['Mode'].unique())
+    X, y = encode_matchups(matchup_df, *encoders)
+    X_train, _, y_train, _ = split_training_data(X, y)
+    model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_train, y_train)
+
+    bundle_dir = os.path.join(tmp_dir, f'{size_name}-bundle')
+    export_bundle(model, *encoders, matchup_df, bundle_dir=bundle_dir)
+    bundle = load_bundle(bundle_dir)
+    single_series = make_random_series(bundle[4], 1, seed)
+    batch_series = make_random_series(bundle[4], 1000, seed)
+
+    benchmarks = {
+        'ingest_workbook': (lambda: read_workbook_sheets(workbook_path), repeats),
+        'ingest_cached': (lambda: load_workbook(workbook_path, cache_dir), repeats),
+        'build_matchups': (lambda: build_matchup_frame(team_data), repeats),
+        'train': (lambda: RandomForestClassifier(n_estimators=100, random_state=42).fit(X_train, y_train), repeats),
+        'cross_validation': (lambda: cross_val_score(RandomForestClassifier(n_estimators=100, random_state=42), X, y,
+                                                     cv=5), max(1, repeats // 2)),
+        'predict_single_series': (lambda: predict_series_batch(*bundle[:4], single_series, bundle[4], verbose=False),
+                                  repeats * 10),
+        'predict_batch_1000': (lambda: predict_series_batch(*bundle[:4], batch_series, bundle[4], verbose=False),
+                               repeats),
+    }
+    results = {}
+    for name, (func, runs) in benchmarks.items():
+        results[f'{size_name}/{name}'] = _time_runs(func, runs)
+        print(f"{size_name}/{name}: {results[f'{size_name}/{name}']['median'] * 1000:.2f} ms")
+    workload = {**params, 'team_rows': len(team_data), 'matchups': len(matchup_df),
+                'workbook_bytes': os.path.getsize(workbook_path)}
+    return results, workload
+
+def default_results_path():
+    """ Results file for this run, named after the time and the checked out commit. """
+    commit = (_git_commit()[0] or 'nogit')[:10]
+    return os.path.join(RESULTS_DIR, f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+
+def run_benchmark_suite(sizes=None, repeats=5, output_path=None, seed=0):
+    """ Run the benchmarks at every league size in sizes (names from BENCHMARK_SIZES) and save them as JSON. """
+    sizes = list(BENCHMARK_SIZES) if sizes is None else sizes
+    report = {'environment': _environment(), 'workloads': {}, 'results': {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_name in sizes:
+            results, workload = _benchmark_size(size_name, BENCHMARK_SIZES[size_name], tmp_dir, repeats, seed)
+            report['results'].update(results)
+            report['workloads'][size_name] = workload
+    import_ms, _ = measure_import_time()
+    report['results']['import_time'] = {'min': import_ms / 1000, 'median': import_ms / 1000, 'mean': import_ms / 1000,
+                                        'stdev': 0.0, 'repeats': 1}
+
+    output_path = output_path or default_results_path()
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved benchmark results to {output_path}")
+    return report
+
+def compare_benchmark_results(baseline_path, current_path, threshold=0.10):
+    """ Print the time ratio of every benchmark in both files, and return the ones slower by more than threshold.
+
+    Runs are compared on their fastest time, which moves the least when something else is using the machine.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    with open(current_path) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        ratio = current[name]['min'] / baseline[name]['min']
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:40s} {baseline[name]['min'] * 1000:10.2f} ms -> {current[name]['min'] * 1000:10.2f} ms"
+              f"  x{ratio:.2f}{flag}")
+    return regressions
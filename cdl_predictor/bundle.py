@@ -0,0 +1,229 @@
+"""Model bundle
+
+Loading the model used to mean unpickling five separate files. Unpickling is slow, and it can run arbitrary code if a file has been tampered with. Instead, everything prediction needs is exported into one versioned bundle folder:
+
+* `manifest.json` holds the schema version, the feature columns, the forest's max depth, and the file, dtype and shape of every array
+* Each array is a plain `.npy` file: the `FlatForest` node arrays, the `MatchupIndex` arrays including its sorted lookup keys, and the team, map and mode vocabularies of the encoders
+* A model trained with `train --augment` stores the per-team `TeamFeatureStore` arrays instead of the `MatchupIndex` ones, and loads as a store
+
+On start the arrays are memory-mapped instead of read, so only the pages a prediction actually touches are loaded. A bundle with a different schema version, or with arrays that don't match the manifest, is rejected. Array file names include a random token and the manifest is written last, so a new bundle only takes effect once it is complete. The arrays of the previous bundle are only removed by the export after, so a load that read the old manifest just before the switch can still open them.
+"""
+
+import json
+import os
+import pickle
+import secrets
+import time
+
+import numpy as np
+
+from .columns import FEATURE_COLS, RATING_FEATURES
+from .feature_store import FEATURE_STORE_PATH, TeamFeatureStore
+from .forest import FlatForest
+from .instrumentation import instrumented
+from .prediction import LOOKUP_ARRAYS, MatchupIndex
+from .utils import atomic_path, run_python
+
+BUNDLE_DIR = 'model_bundle'
+BUNDLE_SCHEMA = 'cdl-predictor-bundle'
+# Version 2 saves the MatchupIndex lookup keys, so loading doesn't read every matchup
+BUNDLE_SCHEMA_VERSION = 2
+
+class VocabEncoder:
+    """ LabelEncoder replacement backed by a sorted vocabulary array. """
+
+    def __init__(self, classes):
+        self.classes_ = classes
+
+    def transform(self, values):
+        values = np.asarray(values, dtype=str)
+        codes = np.searchsorted(self.classes_, values)
+        codes = np.minimum(codes, len(self.classes_) - 1)
+        unseen = self.classes_[codes] != values
+        if unseen.any():
+            raise ValueError(f"y contains previously unseen labels: {sorted(set(values[unseen].tolist()))}")
+        return codes
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(codes)]
+
+@instrumented(memory=True)
+def export_bundle(model, team_encoder, map_encoder, mode_encoder, matchup_df, bundle_dir=BUNDLE_DIR):
+    """ Write the model, encoders and matchup features as a memory-mappable bundle.
+
+    matchup_df can also be a TeamFeatureStore, which is then exported instead of the pairwise matchups.
+    """
+    flat_forest = model if isinstance(model, FlatForest) else FlatForest.from_sklearn(model)
+    if isinstance(matchup_df, TeamFeatureStore):
+        lookup_arrays = {
+            'store_teams': matchup_df.teams,
+            'store_maps': matchup_df.maps,
+            'store_modes': matchup_df.modes,
+            'store_values': matchup_df.values,
+        }
+    else:
+        matchup_index = MatchupIndex.from_frame(matchup_df)
+        lookup_arrays = {
+            'matchup_team_a': matchup_index.team_a,
+            'matchup_team_b': matchup_index.team_b,
+            'matchup_maps': matchup_index.maps,
+            'matchup_modes': matchup_index.modes,
+            'matchup_features': matchup_index.features,
+            **{f'matchup_{name}': array for name, array in matchup_index.lookup_arrays.items()},
+        }
+    arrays = {
+        'forest_feature': flat_forest.feature,
+        'forest_threshold': flat_forest.threshold,
+        'forest_left': flat_forest.left,
+        'forest_right': flat_forest.right,
+        'forest_leaf_values': flat_forest.leaf_values,
+        'forest_roots': flat_forest.roots,
+        'forest_classes': flat_forest.classes_,
+        **lookup_arrays,
+        'team_vocab': np.asarray(team_encoder.classes_, dtype=str),
+        'map_vocab': np.asarray(map_encoder.classes_, dtype=str),
+        'mode_vocab': np.asarray(mode_encoder.classes_, dtype=str),
+    }
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    token = secrets.token_hex(4)
+    manifest = {
+        'schema': BUNDLE_SCHEMA,
+        'schema_version': BUNDLE_SCHEMA_VERSION,
+        'created': time.time(),
+        'feature_cols': list(getattr(model, 'feature_names_in_', (FEATURE_COLS + RATING_FEATURES)[:flat_forest.n_features_in_])),
+        'forest_max_depth': flat_forest.max_depth,
+        'arrays': {},
+    }
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        file_name = f'{name}-{token}.npy'
+        np.save(os.path.join(bundle_dir, file_name), array, allow_pickle=False)
+        manifest['arrays'][name] = {'file': file_name, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    # The manifest is the switch-over point. Loads may still be reading the previous bundle, so keep its arrays
+    # and remove the ones from before it
+    manifest_path = os.path.join(bundle_dir, 'manifest.json')
+    in_use = {entry['file'] for entry in manifest['arrays'].values()}
+    try:
+        with open(manifest_path) as f:
+            in_use |= {entry['file'] for entry in json.load(f)['arrays'].values()}
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    with atomic_path(manifest_path) as tmp_path, open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    for file_name in os.listdir(bundle_dir):
+        if file_name.endswith('.npy') and file_name not in in_use:
+            os.remove(os.path.join(bundle_dir, file_name))
+
+def _read_bundle_arrays(bundle_dir):
+    """ Read the manifest and memory-map every array it lists. """
+    with open(os.path.join(bundle_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('schema') != BUNDLE_SCHEMA or manifest.get('schema_version') != BUNDLE_SCHEMA_VERSION:
+        raise ValueError(f"{bundle_dir} has schema {manifest.get('schema')} version {manifest.get('schema_version')}, "
+                         f"expected {BUNDLE_SCHEMA} version {BUNDLE_SCHEMA_VERSION}")
+
+    arrays = {}
+    for name, entry in manifest['arrays'].items():
+        array = np.load(os.path.join(bundle_dir, entry['file']), mmap_mode='r', allow_pickle=False)
+        if array.dtype.str != entry['dtype'] or list(array.shape) != entry['shape']:
+            raise ValueError(f"{entry['file']} does not match the manifest of {bundle_dir}")
+        arrays[name] = array
+    return manifest, arrays
+
+@instrumented(memory=True)
+def load_bundle(bundle_dir=BUNDLE_DIR, retries=3):
+    """ Memory-map a bundle written by export_bundle and return (model, team_encoder, map_encoder, mode_encoder, matchup_index).
+
+    matchup_index is a TeamFeatureStore for a bundle exported from one.
+    """
+    for attempt in range(retries + 1):
+        try:
+            manifest, arrays = _read_bundle_arrays(bundle_dir)
+            break
+        except FileNotFoundError:
+            # Exports running back to back can remove the arrays of a manifest we just read, the new manifest is in place
+            if attempt == retries or not os.path.exists(os.path.join(bundle_dir, 'manifest.json')):
+                raise
+
+    model = FlatForest(arrays['forest_feature'], arrays['forest_threshold'], arrays['forest_left'], arrays['forest_right'],
+                       arrays['forest_leaf_values'], arrays['forest_roots'], manifest['forest_max_depth'], arrays['forest_classes'],
+                       len(manifest['feature_cols']))
+    if 'store_values' in arrays:
+        matchup_index = TeamFeatureStore(arrays['store_teams'], arrays['store_maps'], arrays['store_modes'], arrays['store_values'])
+    else:
+        matchup_index = MatchupIndex(arrays['matchup_team_a'], arrays['matchup_team_b'], arrays['matchup_maps'],
+                                     arrays['matchup_modes'], arrays['matchup_features'],
+                                     {name: arrays[f'matchup_{name}'] for name in LOOKUP_ARRAYS})
+    return (model, VocabEncoder(arrays['team_vocab']), VocabEncoder(arrays['map_vocab']), VocabEncoder(arrays['mode_vocab']),
+            matchup_index)
+
+# The files the bundle is exported from: pickles, and the compact matchup store
+SOURCE_PATHS = ['random_forest_model.pkl', 'team_encoder.pkl', 'map_encoder.pkl', 'mode_encoder.pkl',
+                'matchup_df.parquet']
+
+def _load_pickled_resources():
+    """ Load the model and encoders from their pickles, and the matchup DataFrame from its store. """
+    from .matchups import read_matchup_store
+
+    resources = []
+    for path in SOURCE_PATHS[:-1]:
+        with open(path, 'rb') as f:
+            resources.append(pickle.load(f))
+    return (*resources, read_matchup_store(SOURCE_PATHS[-1]))
+
+@instrumented(memory=True)
+def load_resources(bundle_dir=BUNDLE_DIR):
+    """ Load the model bundle, re-exporting it from the pickles if it is missing, stale or from an older schema.
+
+    A bundle deployed without the files it was exported from is loaded as it is. When `feature_store.npz` is
+    present, the model was trained with `train --augment` and the store is exported instead of the pairwise matchups.
+    """
+    manifest_path = os.path.join(bundle_dir, 'manifest.json')
+    sources = [path for path in SOURCE_PATHS if os.path.exists(path)]
+    store_sources = [FEATURE_STORE_PATH] if os.path.exists(FEATURE_STORE_PATH) else []
+    if os.path.exists(manifest_path) and os.path.getmtime(manifest_path) >= max(map(os.path.getmtime, sources + store_sources), default=0):
+        try:
+            return load_bundle(bundle_dir)
+        except ValueError as e:
+            if len(sources) < len(SOURCE_PATHS):
+                raise
+            print(f"Rebuilding the model bundle: {e}")
+    resources = _load_pickled_resources()
+    if store_sources:
+        resources = (*resources[:-1], TeamFeatureStore.load(FEATURE_STORE_PATH))
+    export_bundle(*resources, bundle_dir=bundle_dir)
+    return load_bundle(bundle_dir)
+
+"""To compare cold starts fairly, each loader runs in a fresh interpreter that times its own imports and loading and reports its peak resident memory."""
+
+_COLD_START_SCRIPT = """
+import json, time
+from cdl_predictor.utils import peak_rss_bytes
+start = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'max_rss': peak_rss_bytes()}}))
+"""
+
+_COLD_START_LOADERS = {
+    'Bundle (mmap)': "from cdl_predictor.bundle import load_bundle\nresources = load_bundle({bundle_dir!r})",
+    'Pickles': "from cdl_predictor.bundle import _load_pickled_resources\n"
+               "from cdl_predictor.prediction import MatchupIndex\n"
+               "*resources, matchup_df = _load_pickled_resources()\n"
+               "matchup_index = MatchupIndex.from_frame(matchup_df)",
+}
+
+def benchmark_cold_start(bundle_dir=BUNDLE_DIR, repeats=3):
+    """ Cold start time and peak resident memory of loading the bundle against unpickling the loose files. """
+    import pandas as pd
+
+    results = []
+    for name, load in _COLD_START_LOADERS.items():
+        script = _COLD_START_SCRIPT.format(load=load.format(bundle_dir=bundle_dir))
+        runs = [json.loads(run_python(script).stdout) for _ in range(repeats)]
+        results.append({'Loader': name,
+                        'Cold Start (ms)': min(run['seconds'] for run in runs) * 1000,
+                        'Peak RSS (MB)': min(run['max_rss'] for run in runs) / 2**20})
+    return pd.DataFrame(results)
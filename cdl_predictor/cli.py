@@ -0,0 +1,112 @@
+"""Command line interface
+
+`python cdl_predictor2_0.py <command>` runs one stage of the predictor. Each command imports its stage only when it runs, so `predict` and `serve` start without loading sklearn or matplotlib.
+"""
+
+import argparse
+
+from . import instrumentation
+from .columns import FILE_PATH
+
+def main():
+    """ Load model and encoders, get user inputs, make predictions, and display results and series odds. """
+    import numpy as np
+
+    from .bundle import load_resources
+    from .prediction import display_results, get_user_input, predict_series_batch
+    from .simulation import display_series_simulation, exact_series_distribution
+
+    model, team_encoder, map_encoder, mode_encoder, matchup_index = load_resources()
+    team1, team2, maps, modes = get_user_input()
+    results, probabilities = predict_series_batch(model, team_encoder, map_encoder, mode_encoder,
+                                                  [(team1, team2, maps, modes)], matchup_index, return_proba=True)
+    display_results(results[0], team1, team2)
+    map_probabilities = [np.nan if p is None else p for p in probabilities[0]]
+    if np.isnan(map_probabilities).all():
+        print("\nNot enough data to give series odds, none of the maps has matchup data for these teams")
+        return
+    # One series only has 32 map win patterns, so work out its odds exactly instead of sampling them
+    display_series_simulation(exact_series_distribution(map_probabilities), team1, team2)
+
+def run(argv=None):
+    """ Parse the command line and run the chosen stage. """
+    parser = argparse.ArgumentParser(description="Predict CDL series outcomes.")
+    parser.add_argument('command', nargs='?', default='predict',
+                        choices=['predict', 'serve', 'train', 'evaluate', 'plot', 'update', 'ratings', 'whatif', 'benchmark', 'importtime'])
+    parser.add_argument('--file', default=FILE_PATH, help="workbook to train or update from")
+    parser.add_argument('--search', action='store_true', help="run the hyperparameter search before training")
+    parser.add_argument('--match-logs', nargs='+', metavar='PATH',
+                        help="train on stats aggregated from per-match CSV or Parquet logs instead of the workbook")
+    parser.add_argument('--augment', action='store_true',
+                        help="train on both orders of every pair, with the matchups computed from the per-team feature store")
+    parser.add_argument('--max-rss-mb', type=float, help="resident memory cap while streaming the match logs")
+    parser.add_argument('--results', help="CSV of map results, one per row in the order played, for the ratings command")
+    parser.add_argument('--teams', nargs=2, metavar=('TEAM1', 'TEAM2'), help="the two teams for the whatif command")
+    parser.add_argument('--top', type=int, default=5, help="map assignments the whatif command shows for each team")
+    parser.add_argument('--include-missing', action='store_true',
+                        help="whatif also ranks, separately, assignments with maps the teams have no data on as coin flips")
+    parser.add_argument('--sizes', nargs='+', choices=['cdl', 'large'], help="league sizes for the benchmark command")
+    parser.add_argument('--repeats', type=int, default=5, help="timed runs of each benchmark")
+    parser.add_argument('--output', help="where the benchmark command saves its JSON results")
+    parser.add_argument('--compare', metavar='BASELINE', help="benchmark JSON to compare the new results against")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--metrics', metavar='PREFIX',
+                        help="time every stage and write the numbers to PREFIX.json and PREFIX.prom when done")
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        instrumentation.enable()
+    try:
+        _run_command(parser, args)
+    finally:
+        if args.metrics:
+            instrumentation.export_json(args.metrics + '.json')
+            instrumentation.export_prometheus(args.metrics + '.prom')
+
+def _run_command(parser, args):
+    if args.command == 'serve':
+        from .server import serve
+        serve(args.host, args.port)
+    elif args.command == 'train':
+        from .training import train_model, tune_model
+        team_data = None
+        if args.match_logs:
+            from .streaming import aggregate_match_logs
+            team_data = aggregate_match_logs(args.match_logs, max_rss_mb=args.max_rss_mb)
+        if args.search:
+            tune_model(args.file, team_data=team_data, augment=args.augment)
+        else:
+            train_model(args.file, team_data=team_data, augment=args.augment)
+    elif args.command == 'evaluate':
+        from .evaluation import evaluate_model
+        evaluate_model()
+    elif args.command == 'plot':
+        from .plotting import plot_model
+        plot_model()
+    elif args.command == 'update':
+        from .training import update_model
+        update_model(args.file)
+    elif args.command == 'ratings':
+        if not args.results:
+            parser.error("ratings needs --results")
+        from .ratings import build_rating_table
+        build_rating_table(args.results)
+    elif args.command == 'whatif':
+        if not args.teams:
+            parser.error("whatif needs --teams TEAM1 TEAM2")
+        from .bundle import load_resources
+        from .simulation import display_veto_ranking, explore_vetoes
+        ranking = explore_vetoes(*load_resources(), *args.teams, include_missing=args.include_missing)
+        display_veto_ranking(ranking, *args.teams, top=args.top)
+    elif args.command == 'benchmark':
+        from .benchmarks import compare_benchmark_results, default_results_path, run_benchmark_suite
+        output_path = args.output or default_results_path()
+        run_benchmark_suite(args.sizes, args.repeats, output_path)
+        if args.compare and compare_benchmark_results(args.compare, output_path):
+            raise SystemExit(1)
+    elif args.command == 'importtime':
+        from .benchmarks import check_import_time
+        raise SystemExit(0 if check_import_time() else 1)
+    else:
+        main()
@@ -0,0 +1,32 @@
+"""Column names shared by the training and prediction stages.
+
+This module has no imports so any stage can use it without slowing down start-up.
+"""
+
+# The workbook the stages read by default. It lives here so the command line doesn't import pandas for it
+FILE_PATH = 'CDL Stats.xlsx'
+
+# The statistics we compare between two teams, and the name of the differential column each one produces
+MATCHUP_STATS = {
+    'Win %': 'Win % Diff',
+    'K/D': 'K/D Diff',
+    'Avg Point Diff': 'Avg Point Diff Diff',
+    'NTK %': 'NTK % Diff',
+    'NTD %': 'NTD % Diff',
+}
+
+# Columns that identify a matchup
+MATCHUP_KEYS = ['Team A', 'Team B', 'Map', 'Mode']
+
+# The differential features the model is trained on, in the order of FEATURE_COLS
+MATCHUP_FEATURES = ['K/D Diff', 'Avg Point Diff Diff', 'NTK % Diff', 'NTD % Diff']
+
+# Team rating differences that can be appended after MATCHUP_FEATURES, see ratings.py
+RATING_FEATURES = ['Elo Diff', 'Map Elo Diff', 'Form Win % Diff', 'Form Point Diff Diff']
+
+# Define the feature columns and the target column
+FEATURE_COLS = ['Team1 Encoded', 'Team2 Encoded', 'Map Encoded', 'Mode Encoded'] + MATCHUP_FEATURES
+TARGET_COL = 'Win % Diff'  # We want to predict Win% diff between two teams based off the feature columns
+
+# Every best-of-5 series plays its maps in this mode order
+SERIES_MODES = ["Hardpoint", "SND", "Control", "Hardpoint", "SND"]
@@ -0,0 +1,145 @@
+"""Loading and reading data from the workbook
+
+First we are loading the data from our Excel file into our code so we can understand it and manipulate it accordingly.
+
+The workbook has a Team Stats sheet with the average for every statistic for a whole team, and a sheet for every team with Map and Mode specific statistics. This is the data we will use when training our model
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from .instrumentation import instrumented
+from .utils import atomic_path
+
+"""Every call to `pd.read_excel` re-opens the workbook and parses it from scratch, so instead we read every sheet from a single `pd.ExcelFile` handle in one pass.
+
+The result is saved to a cache folder (Parquet if `pyarrow` is installed, otherwise a pickle). The cache is keyed by the workbook's content hash, so the next run loads in milliseconds and any edit to the workbook makes a fresh cache. The modification time and size are stored next to the hash so we only re-hash the file when it has actually been touched.
+"""
+
+CACHE_DIR = '.cdl_cache'
+TEAM_STATS_SHEET = 'Team Stats'
+
+def _workbook_hash(file_path, cache_dir):
+    """ Return the content hash of the workbook, reusing the stored hash if the mtime and size are unchanged. """
+    stat = os.stat(file_path)
+    index_path = os.path.join(cache_dir, 'index.json')
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        # A missing or unreadable index only means the workbook gets hashed again
+        index = {}
+    if not isinstance(index, dict):
+        index = {}
+
+    entry = index.get(os.path.abspath(file_path))
+    if isinstance(entry, dict) and entry.get('mtime') == stat.st_mtime_ns and entry.get('size') == stat.st_size and 'sha256' in entry:
+        return entry['sha256']
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    index[os.path.abspath(file_path)] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest.hexdigest()}
+    # Swapped in whole, so an interrupted run can't leave it truncated
+    with atomic_path(index_path) as tmp_path, open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    return digest.hexdigest()
+
+def _cache_format():
+    """ Use Parquet when pyarrow is available, otherwise fall back to pickle. """
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'pkl'
+
+def _read_cached_frame(path):
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_pickle(path)
+
+def _write_cached_frame(df, path):
+    # Write to a temporary file first so an interrupted run never leaves a half-written cache behind
+    with atomic_path(path) as tmp_path:
+        if path.endswith('.parquet'):
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+
+def read_workbook_sheets(file_path):
+    """ Read the team stats sheet and every team sheet from the workbook in a single pass.
+
+    The team stats sheet is the one named TEAM_STATS_SHEET, or else the first sheet that isn't a team sheet.
+    """
+    with pd.ExcelFile(file_path) as workbook:
+        sheets = pd.read_excel(workbook, sheet_name=None)
+
+    # Team sheets are the ones with per Map and Mode statistics, in the order they appear in the workbook
+    team_data_frames = []
+    other_sheets = []
+    for sheet_name, df in sheets.items():
+        if {'Map', 'Mode'}.issubset(df.columns):
+            # Add a column for the team name
+            df['Team'] = sheet_name
+            team_data_frames.append(df)
+        else:
+            other_sheets.append(sheet_name)
+    if not team_data_frames:
+        raise ValueError(f"{file_path} has no team sheets, a team sheet needs Map and Mode columns")
+    if TEAM_STATS_SHEET not in sheets and not other_sheets:
+        raise ValueError(f"{file_path} has no '{TEAM_STATS_SHEET}' sheet, or any other sheet that isn't a team sheet")
+
+    # Combine all the DataFrames into one
+    combined_team_data = pd.concat(team_data_frames, ignore_index=True)
+    return sheets[TEAM_STATS_SHEET if TEAM_STATS_SHEET in sheets else other_sheets[0]], combined_team_data
+
+@instrumented(memory=True)
+def load_workbook(file_path, cache_dir=CACHE_DIR):
+    """ Load the team stats sheet and the combined team sheets, from the cache if the workbook hasn't changed. """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = _workbook_hash(file_path, cache_dir)
+    ext = _cache_format()
+    team_stats_path = os.path.join(cache_dir, f'{key}-team_stats.{ext}')
+    combined_path = os.path.join(cache_dir, f'{key}-combined_team_data.{ext}')
+
+    if os.path.exists(team_stats_path) and os.path.exists(combined_path):
+        return _read_cached_frame(team_stats_path), _read_cached_frame(combined_path)
+
+    team_stats, combined_team_data = read_workbook_sheets(file_path)
+    _write_cached_frame(team_stats, team_stats_path)
+    _write_cached_frame(combined_team_data, combined_path)
+    return team_stats, combined_team_data
+
+"""To time ingestion at other sizes, `write_synthetic_workbook` writes a workbook with the same layout as `CDL Stats.xlsx`: a Team Stats sheet, then one sheet per team with Map, Mode, Wins, Losses, Win %, Avg Point Diff, K/D, NTK % and NTD % columns."""
+
+def write_synthetic_workbook(path, n_teams=12, n_maps=9, n_seasons=1, seed=0):
+    """ Write a workbook shaped like CDL Stats.xlsx with random stats, and return its combined team data. """
+    from .matchups import make_synthetic_league, synthetic_maps_modes
+
+    league = make_synthetic_league(n_teams, synthetic_maps_modes(n_maps), seed=seed, n_seasons=n_seasons)
+    mode_win_rates = league.pivot_table(index='Team', columns='Mode', values='Win %', sort=False)
+    team_stats = pd.DataFrame({
+        'K/D': league.groupby('Team', sort=False)['K/D'].mean(),
+        'HP Win %': mode_win_rates['Hardpoint'],
+        'S&D Win %': mode_win_rates.get('SND'),
+        'CTL Win %': mode_win_rates.get('Control'),
+    }).round(3).rename_axis('Team').reset_index()
+    with pd.ExcelWriter(path) as writer:
+        team_stats.to_excel(writer, sheet_name=TEAM_STATS_SHEET, index=False)
+        for team, sheet in league.groupby('Team', sort=False):
+            sheet.drop(columns='Team').to_excel(writer, sheet_name=team, index=False)
+    return league
+
+"""# Extract unique map and mode combinations
+
+After studying the data, we can see that there are some maps that are not played in certain modes
+For example: The map Terminal is only played in one game mode, SND and nothing else.
+"""
+
+def unique_maps_modes(combined_team_data):
+    """ Return the map and mode combinations that appear in the team data, in first-seen order. """
+    # Select only the 'Map' and 'Mode' columns and remove any duplicate rows,
+    # then reset the index so the old index is not added as a column
+    return combined_team_data[['Map', 'Mode']].drop_duplicates().reset_index(drop=True)
@@ -0,0 +1,73 @@
+"""Evaluating Random Forest Clasifier model on our data
+
+The operations we are executing in this stage include:
+
+* testing model accuracy, precision, recall and f1-score
+* feature importances
+* cross-validation
+* the confusion matrix
+"""
+
+import pandas as pd
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import cross_val_score
+
+from .columns import FEATURE_COLS
+from .instrumentation import instrumented
+from .training import encode_matchups, load_training_artifacts, split_training_data
+
+def feature_importance_frame(model, feature_cols=FEATURE_COLS):
+    """ Return the model's feature importances as a DataFrame, most important first. """
+    return pd.DataFrame({
+        'Feature': feature_cols,
+        'Importance': model.feature_importances_
+    }).sort_values(by='Importance', ascending=False)
+
+"""# Feature importance
+
+* here we see that the most important feature for determining the winner of a match up is AVG point difference.
+
+Based off the classification report we can infer that our model is doing a pretty good job at predicting winners of CDL matches. Our model does a slightly better job at predicting losers as we can see on Class Report 0
+But it has better precision in predicting winners based off class report 1
+
+# Cross-validation
+* Performs 5-fold cross-validation on the entire dataset (X, y). This method splits the entire dataset into 5 parts, iteratively using 4 parts for training and 1 part for validation. This helps in assessing how well the model generalizes to new data.
+
+# Confusion Matrix
+* Displays the confusion matrix for the predictions on the testing set, which shows true positives, true negatives, false positives, and false negatives.
+* True Positives (TP): 147 - The model correctly predicted 147 positive outcomes.
+* True Negatives (TN): 123 - The model correctly predicted 123 negative outcomes.
+* False Positives (FP): 29 - The model incorrectly predicted 29 outcomes as positive when they were negative.
+* False Negatives (FN): 30 - The model incorrectly predicted 30 outcomes as negative when they were positive.
+"""
+
+@instrumented()
+def evaluate_model():
+    """ Evaluate the saved model on the same 70-30 split it was trained on. """
+    matchup_df, encoders, rf_classifier = load_training_artifacts()
+    X, y = encode_matchups(matchup_df, *encoders)
+    X_train, X_test, y_train, y_test = split_training_data(X, y)
+
+    # Evaluate the model
+    test_predictions = rf_classifier.predict(X_test)
+    print("Accuracy:", accuracy_score(y_test, test_predictions))
+    print("Classification Report:")
+    print(classification_report(y_test, test_predictions))
+    print("Features used for training:", X_train.columns.tolist())
+    print("Training feature shape:", X_train.shape)
+    print("Test feature shape:", X_test.shape)
+    print("Number of features expected in the trained model:", rf_classifier.n_features_in_)
+    print(feature_importance_frame(rf_classifier).to_string(index=False))
+
+    # Display the accuracy for both training and testing sets
+    train_accuracy = accuracy_score(y_train, rf_classifier.predict(X_train))
+    test_accuracy = accuracy_score(y_test, test_predictions)
+    print("Training accuracy, Testing accuracy")
+    print(train_accuracy, test_accuracy)
+
+    # Perform cross-validation
+    cv_scores = cross_val_score(rf_classifier, X, y, cv=5, n_jobs=-1)  # 5-fold cross-validation, one fold per core
+    print("CV Average Score: ", cv_scores.mean())
+
+    print("Confusion Matrix:\n", confusion_matrix(y_test, test_predictions))
+    return confusion_matrix(y_test, test_predictions)
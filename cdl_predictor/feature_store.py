@@ -0,0 +1,281 @@
+"""Symmetric feature store
+
+`matchup_df` stores every unordered pair of teams once per map and mode, so it grows with the square of the number of teams, and a lookup with the teams in the other order has to flip the sign of the stored row. The model is also only trained on the stored orientation: it can pick a different winner depending on which team is entered first, and a map where the two teams are level (a Win % Diff of 0) is always labelled a loss for team 1.
+
+`TeamFeatureStore` keeps the team sheet values instead, one row of `MATCHUP_STATS` per team per map and mode. The differentials of any pair, in either order, are the subtraction of two rows:
+
+* `lookup` returns the same feature row as `MatchupIndex.lookup`, so the store can be passed to `get_matchup_features` and `predict_series_batch` in place of the index
+* `lookup_many` does the subtraction for a whole batch of queries at once
+* `iter_training_batches` generates the training rows of every pair a batch at a time, in both orientations, without building the pairwise table. `fit_forest_from_store` grows a Random Forest over those batches with `warm_start`
+
+`python cdl_predictor2_0.py train --augment` trains the model on both orientations and saves the store as `feature_store.npz`. The model bundle then holds the store instead of the pairwise table, so `predict`, `serve` and `whatif` compute the differentials from it.
+"""
+
+import functools
+import time
+
+import numpy as np
+
+from .columns import FEATURE_COLS, FILE_PATH, MATCHUP_FEATURES, MATCHUP_STATS
+from .utils import atomic_path
+
+# The team statistic each feature is the difference of
+_STAT_BY_FEATURE = {diff_col: stat for stat, diff_col in MATCHUP_STATS.items()}
+TRAINING_BATCH_ROWS = 100_000
+FEATURE_STORE_PATH = 'feature_store.npz'
+
+@functools.lru_cache(maxsize=None)
+def _pair_indices(n_teams):
+    """ Index pairs (i, j) with i < j, in itertools.combinations order, same as build_matchup_frame. """
+    return np.triu_indices(n_teams, k=1)
+
+class TeamFeatureStore:
+    """ MATCHUP_STATS of every team on every map and mode, with differentials computed on demand. """
+
+    def __init__(self, teams, maps, modes, values):
+        teams = np.asarray(teams, dtype=str)
+        keys = list(zip(np.asarray(maps, dtype=str).tolist(), np.asarray(modes, dtype=str).tolist()))
+        self.cells = list(dict.fromkeys(keys))
+        cell_ids = {cell: c for c, cell in enumerate(self.cells)}
+        row_cells = np.array([cell_ids[cell] for cell in keys], dtype=np.intp)
+
+        # Group the rows by cell, keeping the teams of a cell in the order they came in
+        order = np.argsort(row_cells, kind='stable')
+        self.teams = teams[order]
+        self.row_cells = row_cells[order]
+        self.maps = np.array([map_name for map_name, _ in self.cells], dtype=str)[self.row_cells]
+        self.modes = np.array([mode for _, mode in self.cells], dtype=str)[self.row_cells]
+        self.cell_offsets = np.searchsorted(self.row_cells, np.arange(len(self.cells) + 1))
+        # One column per MATCHUP_STATS statistic
+        self.values = np.asarray(values, dtype=np.float64)[order]
+        stats = list(MATCHUP_STATS)
+        self.features = np.ascontiguousarray(self.values[:, [stats.index(_STAT_BY_FEATURE[col]) for col in MATCHUP_FEATURES]])
+        self.win_pct = np.ascontiguousarray(self.values[:, stats.index('Win %')])
+
+        self._rows = {}
+        for row, (team, c) in enumerate(zip(self.teams.tolist(), self.row_cells.tolist())):
+            self._rows.setdefault((team, *self.cells[c]), row)
+
+        # Pairs are numbered cell after cell, in itertools.combinations order within a cell
+        team_counts = np.diff(self.cell_offsets)
+        self.pair_offsets = np.concatenate([[0], np.cumsum(team_counts * (team_counts - 1) // 2)])
+        self.n_pairs = int(self.pair_offsets[-1])
+
+    @classmethod
+    def from_team_data(cls, combined_team_data):
+        """ Build the store from combined_team_data, keeping the first row of a team on a map and mode. """
+        team_rows = combined_team_data.drop_duplicates(['Team', 'Map', 'Mode'])
+        return cls(team_rows['Team'], team_rows['Map'], team_rows['Mode'], team_rows[list(MATCHUP_STATS)].to_numpy())
+
+    def __len__(self):
+        return len(self.teams)
+
+    def save(self, path=FEATURE_STORE_PATH):
+        """ Save the store as plain arrays, written to a temporary file and swapped in with os.replace. """
+        with atomic_path(path, suffix='.npz') as tmp_path:
+            np.savez(tmp_path, teams=self.teams, maps=self.maps, modes=self.modes, values=self.values)
+
+    @classmethod
+    def load(cls, path=FEATURE_STORE_PATH):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(arrays['teams'], arrays['maps'], arrays['modes'], arrays['values'])
+
+    def lookup(self, team1, team2, map_name, mode):
+        """ Return the feature row of team1 vs team2, or None if either team has no data on the map and mode. """
+        row1 = self._rows.get((team1, map_name, mode))
+        row2 = self._rows.get((team2, map_name, mode))
+        if row1 is None or row2 is None or row1 == row2:
+            return None
+        return self.features[row1] - self.features[row2]
+
+    def lookup_many(self, team1s, team2s, maps, modes):
+        """ Feature rows of many team1 vs team2 queries in one subtraction, NaN rows where there is no data. """
+        row1 = np.array([self._rows.get(key, -1) for key in zip(team1s, maps, modes)], dtype=np.intp)
+        row2 = np.array([self._rows.get(key, -1) for key in zip(team2s, maps, modes)], dtype=np.intp)
+        found = (row1 >= 0) & (row2 >= 0) & (row1 != row2)
+        features = np.full((len(row1), self.features.shape[1]), np.nan)
+        features[found] = self.features[row1[found]] - self.features[row2[found]]
+        return features
+
+    def pair_rows(self, pair_ids):
+        """ Return the store rows of Team A and Team B of each pair id. """
+        pair_ids = np.asarray(pair_ids, dtype=np.intp)
+        cells = np.searchsorted(self.pair_offsets, pair_ids, side='right') - 1
+        rows_a = np.empty_like(pair_ids)
+        rows_b = np.empty_like(pair_ids)
+        for c in np.unique(cells).tolist():
+            in_cell = cells == c
+            team_a, team_b = _pair_indices(int(self.cell_offsets[c + 1] - self.cell_offsets[c]))
+            k = pair_ids[in_cell] - self.pair_offsets[c]
+            rows_a[in_cell] = self.cell_offsets[c] + team_a[k]
+            rows_b[in_cell] = self.cell_offsets[c] + team_b[k]
+        return rows_a, rows_b
+
+"""# Training on both orientations
+
+A pair id numbers one unordered pair on one cell. `iter_training_batches` turns pair ids into training rows a batch at a time, so only the ids (8 bytes a pair) are held for the whole table. With `augment` every pair is also added the other way round (team 2 as team 1, every differential negated, the label flipped), and pairs that are level on Win % are left out since neither order has a winner. Without it the batches hold exactly the rows `encode_matchups(build_matchup_frame(...))` gives, in the same order.
+"""
+
+def iter_training_batches(store, team_encoder, map_encoder, mode_encoder, batch_rows=TRAINING_BATCH_ROWS, augment=True,
+                          pair_ids=None, seed=None, drop_ties=None):
+    """ Yield (X, y) training batches of at most batch_rows rows for the pairs in store.
+
+    pair_ids limits the batches to some of the pairs, e.g. a training split. seed shuffles the rows across batches.
+    drop_ties defaults to augment.
+    """
+    import pandas as pd
+
+    drop_ties = augment if drop_ties is None else drop_ties
+    pair_ids = np.arange(store.n_pairs) if pair_ids is None else np.asarray(pair_ids, dtype=np.intp)
+    # An id of n_pairs or more is the pair the other way round
+    ids = np.concatenate([pair_ids, pair_ids + store.n_pairs]) if augment else pair_ids
+    if seed is not None:
+        ids = np.random.default_rng(seed).permutation(ids)
+
+    team_codes = team_encoder.transform(store.teams)
+    map_codes = map_encoder.transform([map_name for map_name, _ in store.cells])[store.row_cells]
+    mode_codes = mode_encoder.transform([mode for _, mode in store.cells])[store.row_cells]
+    for start in range(0, len(ids), batch_rows):
+        batch = ids[start:start + batch_rows]
+        reverse = batch >= store.n_pairs
+        rows_a, rows_b = store.pair_rows(np.where(reverse, batch - store.n_pairs, batch))
+        rows_1 = np.where(reverse, rows_b, rows_a)
+        rows_2 = np.where(reverse, rows_a, rows_b)
+        win_diff = store.win_pct[rows_1] - store.win_pct[rows_2]
+        if drop_ties:
+            rows_1, rows_2, win_diff = rows_1[win_diff != 0], rows_2[win_diff != 0], win_diff[win_diff != 0]
+
+        X = pd.DataFrame({
+            'Team1 Encoded': team_codes[rows_1], 'Team2 Encoded': team_codes[rows_2],
+            'Map Encoded': map_codes[rows_1], 'Mode Encoded': mode_codes[rows_1],
+        })
+        X[MATCHUP_FEATURES] = store.features[rows_1] - store.features[rows_2]
+        yield X[FEATURE_COLS], (win_diff > 0).astype(int)
+
+def fit_forest_from_store(store, team_encoder, map_encoder, mode_encoder, n_estimators=100, augment=True,
+                          batch_rows=TRAINING_BATCH_ROWS, pair_ids=None, random_state=42, params=None):
+    """ Fit a Random Forest on the store's pairs, growing n_estimators trees spread evenly over the batches.
+
+    When all the rows fit in one batch this is the same as fitting a forest on all of them. With more batches every
+    tree only sees the rows of its own batch, so each tree is fitted on a random part of the data. That is a
+    different estimator from a forest fitted on all rows, closer to one with a smaller max_samples.
+    params are extra RandomForestClassifier parameters, e.g. the best configuration of the hyperparameter search.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    params = dict(params or {})
+    n_estimators = params.pop('n_estimators', n_estimators)
+    random_state = params.pop('random_state', random_state)
+    # The batches are always grown with warm_start
+    params.pop('warm_start', None)
+    n_rows = (store.n_pairs if pair_ids is None else len(pair_ids)) * (2 if augment else 1)
+    # Every batch needs at least one tree
+    batch_rows = max(batch_rows, -(-n_rows // n_estimators))
+    n_batches = max(1, -(-n_rows // batch_rows))
+    trees_per_batch = [len(trees) for trees in np.array_split(np.arange(n_estimators), n_batches)]
+
+    model = RandomForestClassifier(n_estimators=0, random_state=random_state, warm_start=True, **params)
+    batches = iter_training_batches(store, team_encoder, map_encoder, mode_encoder, batch_rows, augment, pair_ids,
+                                    seed=random_state if n_batches > 1 else None)
+    for (X, y), trees in zip(batches, trees_per_batch):
+        # warm_start keeps the trees fitted on earlier batches and only fits the new ones
+        model.set_params(n_estimators=model.n_estimators + trees)
+        model.fit(X, y)
+    model.set_params(warm_start=False)
+    return model
+
+"""# Memory, lookup latency and order bias
+
+`benchmark_feature_store` compares the store with the `MatchupIndex` built from the pairwise table on synthetic leagues of growing size. It measures the memory each one holds with `tracemalloc`, and the time of a lookup for random queries in both orders. It also checks that every lookup returns exactly the same row.
+
+`benchmark_orientation_augmentation` trains a forest on the stored orientation only, as `train_model` does, and one on both orientations. Both are scored on held-out pairs in both orders. 'Order Flips %' is the share of held-out pairs and cells where swapping team 1 and team 2 does not swap the predicted winner.
+"""
+
+def _traced_bytes(build):
+    """ Build an object and return it with the memory it still holds once built, as seen by tracemalloc. """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        obj = build()
+        return obj, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+def _random_queries(store, n_queries, rng):
+    """ Random (team1, team2, map, mode) queries for pairs that share a cell, in a random order. """
+    pair_ids = rng.integers(0, store.n_pairs, n_queries)
+    rows_a, rows_b = store.pair_rows(pair_ids)
+    swap = rng.random(n_queries) < 0.5
+    rows_1, rows_2 = np.where(swap, rows_b, rows_a), np.where(swap, rows_a, rows_b)
+    return [(store.teams[r1], store.teams[r2], *store.cells[store.row_cells[r1]])
+            for r1, r2 in zip(rows_1.tolist(), rows_2.tolist())]
+
+def benchmark_feature_store(team_counts=(12, 100, 300), n_lookups=10_000, seed=0):
+    """ Memory and lookup latency of TeamFeatureStore against the MatchupIndex of the pairwise table. """
+    import pandas as pd
+
+    from .matchups import build_matchup_frame, make_synthetic_league
+    from .prediction import MatchupIndex
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for n_teams in team_counts:
+        team_data = make_synthetic_league(n_teams, seed=seed)
+        matchup_df = build_matchup_frame(team_data)
+        matchup_index, index_bytes = _traced_bytes(lambda: MatchupIndex.from_frame(matchup_df))
+        store, store_bytes = _traced_bytes(lambda: TeamFeatureStore.from_team_data(team_data))
+        queries = _random_queries(store, n_lookups, rng)
+
+        timings = {}
+        for label, lookup in (('Table', matchup_index.lookup), ('Store', store.lookup)):
+            start = time.perf_counter()
+            rows = [lookup(*query) for query in queries]
+            timings[label] = time.perf_counter() - start
+            timings[label + ' rows'] = np.vstack(rows)
+        start = time.perf_counter()
+        batched = store.lookup_many(*zip(*queries))
+        timings['Batched'] = time.perf_counter() - start
+        if not (np.array_equal(timings['Table rows'], timings['Store rows']) and np.array_equal(timings['Table rows'], batched)):
+            raise AssertionError(f"The store and the table disagree with {n_teams} teams")
+
+        results.append({'Teams': n_teams, 'Table rows': len(matchup_index), 'Store rows': len(store),
+                        'Table (MB)': index_bytes / 2**20, 'Store (MB)': store_bytes / 2**20,
+                        'Table lookup (us)': timings['Table'] / n_lookups * 1e6,
+                        'Store lookup (us)': timings['Store'] / n_lookups * 1e6,
+                        'Store batched (us)': timings['Batched'] / n_lookups * 1e6})
+    return pd.DataFrame(results)
+
+def benchmark_orientation_augmentation(team_data=None, test_size=0.3, seed=42):
+    """ Held-out accuracy and order flips of a forest trained on one orientation against one trained on both. """
+    import pandas as pd
+    from sklearn.preprocessing import LabelEncoder
+
+    if team_data is None:
+        from .data import load_workbook
+        team_data = load_workbook(FILE_PATH)[1]
+    store = TeamFeatureStore.from_team_data(team_data)
+    encoders = (LabelEncoder().fit(team_data['Team']), LabelEncoder().fit(team_data['Map']),
+                LabelEncoder().fit(team_data['Mode']))
+
+    # Hold out whole pairs so neither orientation of a test pair is trained on
+    pair_ids = np.random.default_rng(seed).permutation(store.n_pairs)
+    n_test = int(len(pair_ids) * test_size)
+    test_ids, train_ids = np.sort(pair_ids[:n_test]), np.sort(pair_ids[n_test:])
+    # Every test pair in both orders, the first n_test rows as stored and the rest the other way round
+    X_test, y_test = next(iter_training_batches(store, *encoders, batch_rows=2 * n_test, pair_ids=test_ids,
+                                                drop_ties=False))
+    def is_level(ids):
+        rows_a, rows_b = store.pair_rows(ids)
+        return store.win_pct[rows_a] == store.win_pct[rows_b]
+    has_winner = ~np.tile(is_level(test_ids), 2)
+
+    results = []
+    for label, augment in (('Stored orientation', False), ('Both orientations', True)):
+        model = fit_forest_from_store(store, *encoders, augment=augment, pair_ids=train_ids, random_state=seed)
+        predictions = model.predict(X_test)
+        training_rows = 2 * int((~is_level(train_ids)).sum()) if augment else len(train_ids)
+        results.append({'Training': label, 'Training rows': training_rows,
+                        'Accuracy': float(np.mean(predictions[has_winner] == y_test[has_winner])),
+                        'Order Flips %': float(np.mean(predictions[:n_test] == predictions[n_test:])) * 100})
+    return pd.DataFrame(results)
@@ -0,0 +1,113 @@
+"""Flat-array forest inference
+
+Scoring a single map through sklearn's `predict_proba` spends most of its time on input validation and dispatching each of the 100 trees one by one in Python. `FlatForest` is a copy of the fitted forest as a handful of flat NumPy arrays, one entry per node of every tree (split feature, threshold, left and right child, and the class probabilities at the leaves).
+
+To predict, all the rows of a batch walk down all the trees at the same time: at each step every (row, tree) pair looks up its current node's split and moves to the left or right child. Leaves point back to themselves, and pairs that have reached their leaf drop out of the next step. It has the same `predict_proba`, `predict` and `classes_` as the sklearn model, so it can be passed anywhere the model is used for prediction.
+"""
+
+import time
+
+import numpy as np
+
+class FlatForest:
+    """ A fitted random forest flattened into contiguous node arrays for fast batch prediction. """
+
+    def __init__(self, feature, threshold, left, right, leaf_values, roots, max_depth, classes, n_features_in=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        # The number of columns the forest was trained on, None if unknown
+        self.n_features_in_ = n_features_in
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """ Flatten the trees of a fitted RandomForestClassifier. """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves and always go "left", so extra steps leave them in place
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+
+            value = tree.value[:, 0, :len(model.classes_)].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            if np.any(normalizer > 1 + 1e-6):
+                # Older sklearn versions store sample counts and normalize them in predict_proba
+                normalizer[normalizer == 0] = 1
+                value = value / normalizer
+            values.append(value)
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        max_depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+        return cls(np.concatenate(features).astype(np.intp), np.concatenate(thresholds), np.concatenate(lefts).astype(np.intp),
+                   np.concatenate(rights).astype(np.intp), np.concatenate(values), np.array(roots, dtype=np.intp),
+                   max_depth, np.asarray(model.classes_), model.n_features_in_)
+
+    def apply(self, X):
+        """ Return the leaf node each row reaches in each tree, shape (n_rows, n_trees). """
+        # sklearn compares float32 features against float64 thresholds, so we do the same
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows, n_features = X.shape
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows) * n_features, len(self.roots))
+
+        # Only keep stepping the (row, tree) pairs that haven't reached a leaf yet
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        flat_X = X.ravel()
+        while len(active):
+            current = nodes[active]
+            go_left = flat_X[row_offsets[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[self.left[current] != current]
+        return nodes.reshape(n_rows, len(self.roots))
+
+    def predict_proba(self, X, chunk_size=4096):
+        """ Class probabilities, averaged over the trees in the same order sklearn sums them. """
+        X = np.asarray(X)
+        proba = np.zeros((len(X), len(self.classes_)))
+        for start in range(0, len(X), chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            chunk = proba[start:start + chunk_size]
+            for tree in range(leaves.shape[1]):
+                chunk += self.leaf_values[leaves[:, tree]]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+def benchmark_flat_forest(model, X, batch_sizes=(1, 100, 100_000), repeats=5, seed=0):
+    """ Check FlatForest matches sklearn's predict_proba exactly on X, then time both for each batch size. """
+    import pandas as pd
+
+    flat_forest = FlatForest.from_sklearn(model)
+    X = np.asarray(X, dtype=np.float64)
+    assert np.array_equal(flat_forest.predict_proba(X), model.predict_proba(X))
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for batch_size in batch_sizes:
+        batch = X[rng.integers(0, len(X), batch_size)]
+        timings = {}
+        for name, predict_proba in (('sklearn', model.predict_proba), ('FlatForest', flat_forest.predict_proba)):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                predict_proba(batch)
+            timings[name] = (time.perf_counter() - start) / repeats
+        results.append({'Batch Size': batch_size, 'sklearn (ms)': timings['sklearn'] * 1000,
+                        'FlatForest (ms)': timings['FlatForest'] * 1000})
+    return pd.DataFrame(results)
@@ -0,0 +1,220 @@
+"""Instrumentation
+
+When a run is slow we want to know which stage the time goes to. The functions on the prediction and training paths are wrapped with `instrumented`, and smaller steps inside them with `stage`. For every stage we keep:
+
+* the number of calls, and the total and longest time of a call
+* optionally the change in resident memory over the call, for the stages that load or build large objects
+
+Instrumentation is off by default. Turn it on with `enable()` or by setting the `CDL_INSTRUMENT=1` environment variable. While it is off a wrapped function costs one extra function call and a flag check, and `stage` returns a shared do-nothing context manager.
+
+The collected numbers can be written as JSON with `export_json`, or in the Prometheus text format with `export_prometheus`. Times include any nested stage, e.g. `predict_series_batch` includes `get_matchup_features`.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+from .utils import atomic_path, current_rss_bytes
+
+_enabled = os.environ.get('CDL_INSTRUMENT', '') not in ('', '0')
+# Each thread records into its own stats so the hot path never waits on a lock, snapshot() adds them up
+_local = threading.local()
+_registry_lock = threading.Lock()
+_thread_stats = []
+
+def enable():
+    """ Start collecting stage timings. """
+    global _enabled
+    _enabled = True
+
+def disable():
+    """ Stop collecting stage timings, keeping what was collected so far. """
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """ Forget every stage timing collected so far. """
+    with _registry_lock:
+        for stats in _thread_stats:
+            stats.clear()
+
+def _rss_bytes():
+    """ Current resident memory of this process, or 0 where /proc isn't available. """
+    return current_rss_bytes() or 0
+
+class _StageStats:
+    __slots__ = ('calls', 'seconds', 'max_seconds', 'rss_delta_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.rss_delta_bytes = 0
+
+def _new_stage_stats(name):
+    try:
+        stats = _local.stats
+    except AttributeError:
+        stats = _local.stats = {}
+        with _registry_lock:
+            _thread_stats.append(stats)
+    stage_stats = stats[name] = _StageStats()
+    return stage_stats
+
+def _record(name, seconds, rss_delta, calls=1):
+    try:
+        stage_stats = _local.stats[name]
+    except (AttributeError, KeyError):
+        stage_stats = _new_stage_stats(name)
+    stage_stats.calls += calls
+    stage_stats.seconds += seconds
+    if seconds > stage_stats.max_seconds:
+        stage_stats.max_seconds = seconds
+    stage_stats.rss_delta_bytes += rss_delta
+
+class _Stage:
+    """ Times one run of a stage and records it on exit. """
+
+    __slots__ = ('name', 'memory', 'calls', 'start', 'rss')
+
+    def __init__(self, name, memory, calls=1):
+        self.name = name
+        self.memory = memory
+        self.calls = calls
+
+    def __enter__(self):
+        self.rss = _rss_bytes() if self.memory else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        _record(self.name, seconds, _rss_bytes() - self.rss if self.memory else 0, self.calls)
+        return False
+
+class _NoStage:
+    """ Context manager used while instrumentation is off. """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_STAGE = _NoStage()
+
+def stage(name, memory=False, calls=1):
+    """ Context manager that times the block under name, and its RSS change if memory is True.
+
+    A block that runs a stage many times in a loop can record them as one block of calls, so a hot loop
+    pays for one record instead of one per call. The longest call is then the whole block.
+    """
+    return _Stage(name, memory, calls) if _enabled else _NO_STAGE
+
+def instrumented(name=None, memory=False):
+    """ Decorator that times every call of a function as a stage, named after the function by default. """
+    def decorate(func):
+        stage_name = name or func.__name__
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            if memory:
+                with _Stage(stage_name, True):
+                    return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = perf_counter() - start
+                try:
+                    stage_stats = _local.stats[stage_name]
+                except (AttributeError, KeyError):
+                    stage_stats = _new_stage_stats(stage_name)
+                stage_stats.calls += 1
+                stage_stats.seconds += seconds
+                if seconds > stage_stats.max_seconds:
+                    stage_stats.max_seconds = seconds
+        return wrapper
+    return decorate
+
+def snapshot():
+    """ Return the collected stats of every thread added up, keyed by stage name. """
+    with _registry_lock:
+        per_thread = [list(stats.items()) for stats in _thread_stats]
+    totals = {}
+    for items in per_thread:
+        for name, stage_stats in items:
+            total = totals.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rss_delta_bytes': 0})
+            total['calls'] += stage_stats.calls
+            total['seconds'] += stage_stats.seconds
+            total['max_seconds'] = max(total['max_seconds'], stage_stats.max_seconds)
+            total['rss_delta_bytes'] += stage_stats.rss_delta_bytes
+    return totals
+
+def _write_atomic(text, path):
+    with atomic_path(path) as tmp_path, open(tmp_path, 'w') as f:
+        f.write(text)
+
+def export_json(path):
+    """ Write the collected stats to a JSON file. """
+    _write_atomic(json.dumps(snapshot(), indent=2, sort_keys=True), path)
+
+def prometheus_text(prefix='cdl'):
+    """ Return the collected stats in the Prometheus text exposition format. """
+    metrics = [
+        ('stage_calls_total', 'counter', 'Number of calls of the stage', 'calls'),
+        ('stage_seconds_total', 'counter', 'Total time spent in the stage', 'seconds'),
+        ('stage_seconds_max', 'gauge', 'Longest single call of the stage', 'max_seconds'),
+        ('stage_rss_delta_bytes_total', 'counter', 'Total change in resident memory over calls of the stage',
+         'rss_delta_bytes'),
+    ]
+    stats = snapshot()
+    lines = []
+    for metric, metric_type, help_text, key in metrics:
+        lines.append(f'# HELP {prefix}_{metric} {help_text}')
+        lines.append(f'# TYPE {prefix}_{metric} {metric_type}')
+        for name in sorted(stats):
+            lines.append(f'{prefix}_{metric}{{stage="{name}"}} {stats[name][key]!r}')
+    return '\n'.join(lines) + '\n'
+
+def export_prometheus(path, prefix='cdl'):
+    """ Write the collected stats to a Prometheus text file, e.g. for the node exporter's textfile collector. """
+    _write_atomic(prometheus_text(prefix), path)
+
+def benchmark_instrumentation_overhead(resources=None, n_series=1000, repeats=30, seed=0):
+    """ Time predict_series_batch on n_series random series with instrumentation off and on. """
+    import numpy as np
+
+    from .bundle import load_resources
+    from .prediction import make_random_series, predict_series_batch
+
+    was_enabled = _enabled
+    model, team_encoder, map_encoder, mode_encoder, matchup_index = resources or load_resources()
+    series_list = make_random_series(matchup_index, n_series, seed)
+
+    runs = {'Off': [], 'On': []}
+    try:
+        # Alternate off and on runs so warm-up and background load affect both the same way
+        for _ in range(repeats):
+            for label, switch in (('Off', disable), ('On', enable)):
+                switch()
+                start = time.perf_counter()
+                predict_series_batch(model, team_encoder, map_encoder, mode_encoder, series_list, matchup_index,
+                                     verbose=False)
+                runs[label].append(time.perf_counter() - start)
+    finally:
+        (enable if was_enabled else disable)()
+    # Compare each on run with the off run just before it, the median ratio ignores runs hit by other processes
+    overhead = float(np.median(np.array(runs['On']) / np.array(runs['Off']))) - 1
+    return {'Series': n_series, 'Off (ms)': min(runs['Off']) * 1000, 'On (ms)': min(runs['On']) * 1000,
+            'Overhead %': overhead * 100}
@@ -0,0 +1,235 @@
+"""Feature Engineering
+
+This script calculates differential statistics between pairs of teams for each map and game mode. This involves:
+
+* Creating new features like 'Win % Diff', 'K/D Diff', etc., represent the difference between the two teams' original statistics.
+
+* These features are very useful in predictive modeling because they directly compare the performance metrics of two teams, which might be more predictive of match outcomes than the raw statistics alone.
+"""
+
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from .columns import MATCHUP_KEYS, MATCHUP_STATS
+from .instrumentation import instrumented
+from .utils import atomic_path
+
+"""* **itertools**: A module that provides various functions that work on iterators to produce complex iterators. Here, it is used to generate combinations of teams.
+* **numpy**: Used to compute the differentials for every pair of teams at once instead of one pair at a time.
+"""
+
+"""The original version of this step looped over every map and mode, then over every pair of teams, and filtered the whole `combined_team_data` frame twice per pair. We keep it here as a reference so we can check the faster version gives exactly the same answer."""
+
+def _build_matchup_frame_loop(combined_team_data):
+    """ Reference pair-by-pair implementation of build_matchup_frame. """
+    unique_maps_modes = combined_team_data[['Map', 'Mode']].drop_duplicates()
+
+    # Initialize an empty list to store matchup data
+    matchup_data = []
+
+    # Iterate over each map and mode combination
+    for _, row in unique_maps_modes.iterrows():
+        map_name = row['Map']
+        mode_name = row['Mode']
+
+        # Get all teams that have data for this map and mode
+        valid_teams = combined_team_data[(combined_team_data['Map'] == map_name) & (combined_team_data['Mode'] == mode_name)]['Team'].unique()
+
+        # Generate all possible matchups using itertools for these teams
+        for team_a, team_b in itertools.combinations(valid_teams, 2):
+            # These lines retrieve the specific data for each team concerning the current map and mode.
+            team_a_data = combined_team_data[(combined_team_data['Team'] == team_a) & (combined_team_data['Map'] == map_name) & (combined_team_data['Mode'] == mode_name)]
+            team_b_data = combined_team_data[(combined_team_data['Team'] == team_b) & (combined_team_data['Map'] == map_name) & (combined_team_data['Mode'] == mode_name)]
+
+            # If theres data for both teams we then calculate the differential features
+            if not team_a_data.empty and not team_b_data.empty:
+                diffs = {'Team A': team_a, 'Team B': team_b, 'Map': map_name, 'Mode': mode_name}
+                for stat, diff_col in MATCHUP_STATS.items():
+                    diffs[diff_col] = team_a_data[stat].values[0] - team_b_data[stat].values[0]
+                matchup_data.append(diffs)
+
+    # Convert the list of dictionaries to a DataFrame
+    return pd.DataFrame(matchup_data)
+
+"""`build_matchup_frame` does the same job, but handles each map and mode group in one go:
+
+1. Each team's row for the group is put into a NumPy array (one row per team, one column per statistic)
+2. `np.triu_indices` gives us every (Team A, Team B) pair in the same order `itertools.combinations` would
+3. A single subtraction of the two indexed arrays calculates the differentials for every pair at once
+
+The rows come out in the same order as the loop above, so the train/test split later on is unchanged.
+"""
+
+@instrumented(memory=True)
+def build_matchup_frame(combined_team_data):
+    """ Build the matchup differential DataFrame for every pair of teams on each map and mode. """
+    stats = list(MATCHUP_STATS)
+    diff_cols = list(MATCHUP_STATS.values())
+
+    # Only the first row for a team on a map and mode is used, same as the loop version
+    team_rows = combined_team_data.drop_duplicates(['Team', 'Map', 'Mode'])
+
+    frames = []
+    for (map_name, mode_name), group in team_rows.groupby(['Map', 'Mode'], sort=False):
+        if len(group) < 2:
+            continue
+        teams = group['Team'].to_numpy()
+        values = group[stats].to_numpy()
+
+        # Index pairs (i, j) with i < j, in itertools.combinations order
+        team_a_idx, team_b_idx = np.triu_indices(len(group), k=1)
+        frame = pd.DataFrame(values[team_a_idx] - values[team_b_idx], columns=diff_cols)
+        frame.insert(0, 'Team A', teams[team_a_idx])
+        frame.insert(1, 'Team B', teams[team_b_idx])
+        frame.insert(2, 'Map', map_name)
+        frame.insert(3, 'Mode', mode_name)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(columns=['Team A', 'Team B', 'Map', 'Mode'] + diff_cols)
+    return pd.concat(frames, ignore_index=True)
+
+"""To see how both versions hold up as more teams are added (Challengers teams, more seasons), we can generate a fake league with the same columns as our team sheets and time them against each other."""
+
+def synthetic_maps_modes(n_maps):
+    """ Map and mode pairs for n_maps made-up maps: every map in Hardpoint, two in three in SND, one in three in Control. """
+    pairs = [(f'Map {i + 1:02d}', 'Hardpoint') for i in range(n_maps)]
+    pairs += [(f'Map {i + 1:02d}', 'SND') for i in range(n_maps) if i % 3 != 2]
+    pairs += [(f'Map {i + 1:02d}', 'Control') for i in range(n_maps) if i % 3 == 0]
+    return pairs
+
+def make_synthetic_league(n_teams, maps_modes=None, seed=0, n_seasons=1):
+    """ Generate a combined_team_data-shaped DataFrame with random stats for n_teams teams.
+
+    n_seasons scales the number of maps each team has played, as if the sheets covered that many seasons.
+    """
+    if maps_modes is None:
+        maps_modes = [('6 Star', 'Hardpoint'), ('Highrise', 'Hardpoint'), ('Karachi', 'Hardpoint'), ('Rio', 'Hardpoint'),
+                      ('Invasion', 'Hardpoint'), ('Terminal', 'Hardpoint'), ('Vista', 'Hardpoint'), ('Skidrow', 'Hardpoint'),
+                      ('Sub Base', 'Hardpoint'), ('Highrise', 'SND'), ('Karachi', 'SND'), ('Rio', 'SND'),
+                      ('Invasion', 'SND'), ('Terminal', 'SND'), ('Highrise', 'Control'), ('Karachi', 'Control'),
+                      ('Invasion', 'Control')]
+    rng = np.random.default_rng(seed)
+    n_rows = n_teams * len(maps_modes)
+    wins = rng.integers(0, 12 * n_seasons, n_rows)
+    losses = rng.integers(0, 12 * n_seasons, n_rows)
+    return pd.DataFrame({
+        'Map': [map_name for _ in range(n_teams) for map_name, _ in maps_modes],
+        'Mode': [mode for _ in range(n_teams) for _, mode in maps_modes],
+        'Wins': wins,
+        'Losses': losses,
+        'Win %': np.round(wins / np.maximum(wins + losses, 1), 3),
+        'Avg Point Diff': np.round(rng.normal(0, 20, n_rows), 2),
+        'K/D': np.round(rng.normal(1.0, 0.08, n_rows), 2),
+        'NTK %': np.round(rng.uniform(0.6, 0.8, n_rows), 4),
+        'NTD %': np.round(rng.uniform(0.6, 0.8, n_rows), 4),
+        'Team': np.repeat([f'T{i:03d}' for i in range(n_teams)], len(maps_modes)),
+    })
+
+def benchmark_matchup_builder(team_counts=(12, 48, 200), loop_max_teams=48, repeats=3):
+    """ Time build_matchup_frame against the loop version on synthetic leagues and check they agree. """
+    results = []
+    for n_teams in team_counts:
+        league = make_synthetic_league(n_teams)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fast = build_matchup_frame(league)
+        fast_time = (time.perf_counter() - start) / repeats
+
+        # The loop is quadratic in the number of teams, so we only run it on the smaller leagues
+        loop_time = None
+        if n_teams <= loop_max_teams:
+            start = time.perf_counter()
+            slow = _build_matchup_frame_loop(league)
+            loop_time = time.perf_counter() - start
+            pd.testing.assert_frame_equal(fast, slow)
+
+        results.append({'Teams': n_teams, 'Matchups': len(fast), 'Vectorized (s)': fast_time, 'Loop (s)': loop_time})
+    return pd.DataFrame(results)
+
+"""When new results are added to the workbook, only the matchups involving a team whose stats changed on a map and mode need to be recomputed."""
+
+def changed_team_cells(old_team_data, new_team_data):
+    """ Return the (Team, Map, Mode) cells whose statistics were added, removed or changed. """
+    keys = ['Team', 'Map', 'Mode']
+    stats = list(MATCHUP_STATS)
+    old = old_team_data.drop_duplicates(keys)[keys + stats]
+    new = new_team_data.drop_duplicates(keys)[keys + stats]
+    merged = old.merge(new, on=keys, how='outer', suffixes=(' Old', ' New'), indicator=True)
+
+    changed = merged['_merge'] != 'both'
+    for stat in stats:
+        before, after = merged[f'{stat} Old'], merged[f'{stat} New']
+        changed |= ~((before == after) | (before.isna() & after.isna()))
+    return merged.loc[changed, keys].reset_index(drop=True)
+
+@instrumented(memory=True)
+def update_matchup_frame(matchup_df, new_team_data, changed_cells):
+    """ Recompute only the matchup rows involving a changed team cell and keep the rest of matchup_df.
+
+    Recomputed rows stay where they were, so unless matchups were added or removed the row order matches a full rebuild.
+    """
+    changed = pd.MultiIndex.from_frame(changed_cells)
+    diff_cols = list(MATCHUP_STATS.values())
+
+    def involves_changed_cell(df):
+        team_a_cells = pd.MultiIndex.from_frame(df[['Team A', 'Map', 'Mode']]).isin(changed)
+        team_b_cells = pd.MultiIndex.from_frame(df[['Team B', 'Map', 'Mode']]).isin(changed)
+        return team_a_cells | team_b_cells
+
+    # Rebuild the affected map and mode groups, and take the pairs that involve a changed cell
+    affected_groups = pd.MultiIndex.from_frame(changed_cells[['Map', 'Mode']]).unique()
+    in_affected_group = pd.MultiIndex.from_frame(new_team_data[['Map', 'Mode']]).isin(affected_groups)
+    rebuilt = build_matchup_frame(new_team_data[in_affected_group])
+    if not rebuilt.empty:
+        rebuilt = rebuilt[involves_changed_cell(rebuilt)]
+
+    # Write a rebuilt matchup over its old row so every row keeps its position, and with it its train/test split
+    old_keys = pd.MultiIndex.from_frame(matchup_df[MATCHUP_KEYS].astype(str))
+    positions = old_keys.get_indexer(pd.MultiIndex.from_frame(rebuilt[MATCHUP_KEYS].astype(str)))
+    replaced = positions >= 0
+    values = matchup_df[diff_cols].to_numpy(dtype=np.float64, copy=True)
+    values[positions[replaced]] = rebuilt.loc[replaced, diff_cols].to_numpy(dtype=np.float64)
+    updated = matchup_df[MATCHUP_KEYS].reset_index(drop=True)
+    updated[diff_cols] = values
+
+    # Matchups that involve a changed cell but weren't rebuilt no longer exist, new ones go at the end
+    removed = involves_changed_cell(matchup_df)
+    removed[positions[replaced]] = False
+    return pd.concat([updated[~removed], rebuilt[~replaced]], ignore_index=True)
+
+"""# Compact matchup store
+
+Every pair of teams on every map and mode gets a row, so `matchup_df` grows with the square of the number of teams. `compact_matchup_frame` stores it in much less memory:
+
+* `Team A`, `Team B`, `Map` and `Mode` become pandas Categoricals whose categories are the encoders' `classes_`, so each row only holds a small integer code, and that code is exactly what the encoder would give
+* The differential columns are stored as float32. The Random Forest converts its input to float32 before fitting or predicting anyway, so the model sees exactly the same numbers
+
+`write_matchup_store` saves it as a zstd-compressed Parquet file instead of a pickle, keeping the categories and dtypes.
+"""
+
+def compact_matchup_frame(matchup_df, team_encoder, map_encoder, mode_encoder):
+    """ Return matchup_df with Categorical key columns on the encoders' vocabularies and float32 differentials. """
+    compact = {}
+    for col, encoder in (('Team A', team_encoder), ('Team B', team_encoder), ('Map', map_encoder), ('Mode', mode_encoder)):
+        values = pd.Categorical(matchup_df[col], categories=encoder.classes_)
+        if (values.codes < 0).any():
+            unseen = sorted(set(matchup_df[col][values.codes < 0]))
+            raise ValueError(f"'{col}' contains labels the encoder doesn't know: {unseen}")
+        compact[col] = values
+    for col in MATCHUP_STATS.values():
+        compact[col] = matchup_df[col].to_numpy(dtype=np.float32)
+    return pd.DataFrame(compact)
+
+def write_matchup_store(matchup_df, path):
+    """ Save matchup_df as a compressed Parquet file, written next to path and swapped in with os.replace. """
+    with atomic_path(path) as tmp_path:
+        matchup_df.to_parquet(tmp_path, compression='zstd', index=False)
+
+def read_matchup_store(path):
+    """ Load a matchup store written by write_matchup_store. """
+    return pd.read_parquet(path)
@@ -0,0 +1,37 @@
+"""Plots of the trained model and the matchup data
+
+* visualizing feature importances
+* examining correlations among features
+
+From the correlation matrix we see that we correctly chose the right features to train our model on. We did not choose to include Win%Diff in our features due to its high correlations with other features.
+
+This high correlations are implications of redundancy in the data, especially with Win%Diff
+"""
+
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from .columns import MATCHUP_FEATURES, TARGET_COL
+from .evaluation import feature_importance_frame
+from .training import load_training_artifacts
+
+def plot_feature_importances(model):
+    """ Bar chart of the model's feature importances. """
+    feature_importances = feature_importance_frame(model).set_index('Feature')['Importance']
+    plt.figure(figsize=(10, 6))
+    feature_importances.nlargest(10).plot(kind='barh')
+    plt.title("Feature Importances")
+
+def plot_correlation_matrix(matchup_df):
+    """ Heatmap of the correlations between the differential columns. """
+    correlation_matrix = matchup_df[[TARGET_COL] + MATCHUP_FEATURES].corr()
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(correlation_matrix, annot=True, fmt=".2f", cmap='coolwarm')
+    plt.title("Feature Correlation Matrix")
+
+def plot_model():
+    """ Show the feature importance and correlation plots for the saved model. """
+    matchup_df, _, rf_classifier = load_training_artifacts()
+    plot_feature_importances(rf_classifier)
+    plot_correlation_matrix(matchup_df)
+    plt.show()
@@ -0,0 +1,288 @@
+"""Predictions
+
+This stage loads the trained model and predicts the outcome of a best-of-5 series. It only needs NumPy, so starting a prediction doesn't pay for importing sklearn or pandas.
+"""
+
+import time
+
+import numpy as np
+
+from .columns import MATCHUP_FEATURES, SERIES_MODES
+from .instrumentation import instrumented, stage
+
+"""Looking up a matchup in `matchup_df` means scanning the whole frame with several boolean masks, once for every map of the series. Instead we build a `MatchupIndex` once:
+
+* The differential features are stored in one contiguous NumPy array, one row per matchup
+* Every matchup gets an int64 key from the codes of its unordered team pair, map and mode in sorted vocabularies. The keys are kept sorted, with the row number of each and an orientation bit saying whether the first team of the sorted pair is the stored Team A
+
+A lookup turns the names into codes with small dicts over the vocabularies, finds the key with `np.searchsorted` and takes that row of the array. If the teams were asked for in the other order we flip the sign of the row.
+
+Everything the lookup needs is a plain array, so the model bundle saves them as they are. Loading the bundle memory-maps them and only builds the vocabulary dicts, with one entry per team, map and mode, instead of reading every matchup.
+"""
+
+# The arrays the lookup is built from, saved with the matchup arrays in the model bundle
+LOOKUP_ARRAYS = ('team_vocab', 'map_vocab', 'mode_vocab', 'keys', 'key_rows', 'key_is_team_a')
+
+class MatchupIndex:
+    """ Sorted-key lookup of matchup features keyed by unordered team pair, map and mode. """
+
+    def __init__(self, team_a, team_b, maps, modes, features, lookup_arrays=None):
+        self.team_a = np.asarray(team_a, dtype=str)
+        self.team_b = np.asarray(team_b, dtype=str)
+        self.maps = np.asarray(maps, dtype=str)
+        self.modes = np.asarray(modes, dtype=str)
+        self.features = np.ascontiguousarray(features, dtype=np.float64)
+        if lookup_arrays is None:
+            lookup_arrays = self._build_lookup_arrays(self.team_a, self.team_b, self.maps, self.modes)
+        # Plain ndarray views of memory-mapped arrays, indexing a np.memmap is several times slower
+        self.lookup_arrays = {name: np.asarray(lookup_arrays[name]) for name in LOOKUP_ARRAYS}
+        self.team_vocab, self.map_vocab, self.mode_vocab, self.keys, self.key_rows, self.key_is_team_a = (
+            self.lookup_arrays[name] for name in LOOKUP_ARRAYS)
+        self._team_codes = {name: code for code, name in enumerate(self.team_vocab.tolist())}
+        self._map_codes = {name: code for code, name in enumerate(self.map_vocab.tolist())}
+        self._mode_codes = {name: code for code, name in enumerate(self.mode_vocab.tolist())}
+
+    @staticmethod
+    def _build_lookup_arrays(team_a, team_b, maps, modes):
+        """ The sorted keys of every matchup, with their rows and orientation, and the vocabularies they use. """
+        team_vocab, team_codes = np.unique(np.concatenate([team_a, team_b]), return_inverse=True)
+        code_a, code_b = team_codes[:len(team_a)], team_codes[len(team_a):]
+        map_vocab, map_codes = np.unique(maps, return_inverse=True)
+        mode_vocab, mode_codes = np.unique(modes, return_inverse=True)
+        keys = ((np.minimum(code_a, code_b).astype(np.int64) * len(team_vocab) + np.maximum(code_a, code_b))
+                * len(map_vocab) + map_codes) * len(mode_vocab) + mode_codes
+        # Keep the first row for a matchup, same as the frame scan did
+        keys, key_rows = np.unique(keys, return_index=True)
+        return {'team_vocab': team_vocab, 'map_vocab': map_vocab, 'mode_vocab': mode_vocab, 'keys': keys,
+                'key_rows': key_rows.astype(np.int64), 'key_is_team_a': (code_a <= code_b)[key_rows]}
+
+    @classmethod
+    def from_frame(cls, matchup_df):
+        """ Build the index from a matchup DataFrame. """
+        return cls(matchup_df['Team A'], matchup_df['Team B'], matchup_df['Map'], matchup_df['Mode'],
+                   matchup_df[MATCHUP_FEATURES].to_numpy(dtype=np.float64))
+
+    def __len__(self):
+        return len(self.features)
+
+    def lookup(self, team1, team2, map_name, mode):
+        """ Return the feature row oriented as team1 vs team2, or None if there is no matchup data. """
+        code1, code2 = self._team_codes.get(team1), self._team_codes.get(team2)
+        map_code, mode_code = self._map_codes.get(map_name), self._mode_codes.get(mode)
+        if code1 is None or code2 is None or map_code is None or mode_code is None:
+            return None
+        key = ((min(code1, code2) * len(self.team_vocab) + max(code1, code2)) * len(self.map_vocab) + map_code) \
+            * len(self.mode_vocab) + mode_code
+        # item() returns Python scalars, comparing NumPy scalars is slower than the search itself
+        position = int(self.keys.searchsorted(key))
+        if position == len(self.keys) or self.keys.item(position) != key:
+            return None
+        row = self.key_rows.item(position)
+        # The stored row is Team A minus Team B, so flip it if team1 is the stored Team B
+        if (code1 <= code2) == self.key_is_team_a.item(position):
+            return self.features[row]
+        return -self.features[row]
+
+"""Then we will collect personalized user input data of what matchup the model should predict"""
+
+def get_user_input():
+    """ Collect input from the user for the teams and each map in the best-of-5 series. """
+    print("Enter the teams for the best-of-5 match prediction.")
+    team1 = input("Enter Team 1: ")
+    team2 = input("Enter Team 2: ")
+    maps = []
+    print("Enter the details for each of the 5 maps:")
+    for i in range(1, 6):
+        map_name = input(f"Enter map {i}: ")
+        maps.append(map_name)
+    modes = list(SERIES_MODES)
+    return team1, team2, maps, modes
+
+"""This will pull the matchup info from the DataFrame based on the teams and maps the user inputted.
+This script also handles missing values by letting users know if there is or if there is not any matchup history between the selected teams
+"""
+
+@instrumented()
+def get_matchup_features(team1, team2, map_name, mode, matchup_index, verbose=True, ratings=None):
+    """ Retrieve matchup features for the specified teams, map, and mode, adjusting for team order.
+
+    If a RatingTable is given as ratings, the RATING_FEATURES differences are appended after the matchup features.
+    """
+    features = matchup_index.lookup(team1, team2, map_name, mode)
+    if features is not None and ratings is not None:
+        rating_features = ratings.lookup(team1, team2, map_name, mode)
+        features = None if rating_features is None else np.concatenate((features, rating_features))
+    if features is None:
+        if verbose:
+            print(f"No matchup data available for teams {team1} and {team2} on map {map_name} with mode {mode}")
+        return None  # No data available for this matchup
+    return features
+
+"""The previous version of `get_matchup_features` scanned the whole DataFrame on every call. We keep it to compare lookup latency against the index."""
+
+def _get_matchup_features_scan(team1, team2, map_name, mode, matchup_df):
+    """ Reference frame-scan implementation of get_matchup_features. """
+    condition_a = (matchup_df['Team A'] == team1) & (matchup_df['Team B'] == team2)
+    condition_b = (matchup_df['Team A'] == team2) & (matchup_df['Team B'] == team1)
+    map_mode = (matchup_df['Map'] == map_name) & (matchup_df['Mode'] == mode)
+
+    if (condition_a & map_mode).any():
+        return matchup_df.loc[condition_a & map_mode, MATCHUP_FEATURES].iloc[0].to_numpy()
+    if (condition_b & map_mode).any():
+        # Reverse the differential features
+        return -matchup_df.loc[condition_b & map_mode, MATCHUP_FEATURES].iloc[0].to_numpy()
+    return None
+
+def benchmark_matchup_lookup(matchup_df, n_lookups=1000, seed=0):
+    """ Time per-lookup latency of the frame scan against the matchup index on random matchups. """
+    matchup_index = MatchupIndex.from_frame(matchup_df)
+    rng = np.random.default_rng(seed)
+    rows = matchup_df.iloc[rng.integers(0, len(matchup_df), n_lookups)]
+    # Ask for half of the matchups in reversed order so both orientations are timed
+    swap = rng.random(n_lookups) < 0.5
+    queries = [(b, a, m, mo) if s else (a, b, m, mo)
+               for a, b, m, mo, s in zip(rows['Team A'], rows['Team B'], rows['Map'], rows['Mode'], swap)]
+
+    start = time.perf_counter()
+    scanned = [_get_matchup_features_scan(*query, matchup_df) for query in queries]
+    scan_time = (time.perf_counter() - start) / n_lookups
+
+    start = time.perf_counter()
+    indexed = [matchup_index.lookup(*query) for query in queries]
+    index_time = (time.perf_counter() - start) / n_lookups
+
+    assert all(np.array_equal(a, b) for a, b in zip(scanned, indexed))
+    return {'Frame scan (us)': scan_time * 1e6, 'Index (us)': index_time * 1e6}
+
+"""This is our predict outcomes script
+with the input parameters being the features we trained our model on.
+
+
+
+*   Iterates over each map and mode combination to predict the outcome for each matchup.
+*   Uses the model to generate predictions for each matchup based on the features, in one batch for the whole series.
+*   Appends the map name, mode, and prediction result (or "Data Not Available" if no data) to the results list.
+
+"""
+
+def predict_outcomes(model, team_encoder, map_encoder, mode_encoder, team1, team2, maps, modes, matchup_index):
+    """ Predict the winner of each map in a single series. """
+    return predict_series_batch(model, team_encoder, map_encoder, mode_encoder, [(team1, team2, maps, modes)], matchup_index)[0]
+
+"""For a whole matchweek we want to score many series at once. Calling the encoders and `model.predict` once per map means every map pays sklearn's full input validation and tree dispatch for a single row, so `predict_series_batch` instead:
+
+1. Looks up the matchup features for every map of every series and stacks them into one 2-D feature matrix
+2. Encodes all the teams, maps and modes with one `transform` call per encoder
+3. Runs a single `predict_proba` call for the whole matrix
+4. Scatters the predictions back into one results list per series, in the same format `display_results` expects
+
+Maps without matchup data are marked "Data Not Available" and left out of the matrix.
+"""
+
+@instrumented(memory=True)
+def predict_series_batch(model, team_encoder, map_encoder, mode_encoder, series_list, matchup_index, return_proba=False, verbose=True,
+                         ratings=None):
+    """ Predict every map of every (team1, team2, maps, modes) series with one predict_proba call.
+
+    Pass ratings (a RatingTable) for a model trained with RATING_FEATURES after the matchup features. A ValueError is
+    raised if the number of feature columns doesn't match what the model was trained on. The model `train_model`
+    saves and the bundle ship don't use the ratings, and nothing loads a RatingTable for `predict`, `serve` or `whatif` yet.
+    """
+    results = [[] for _ in series_list]
+    team1s, team2s, map_names, mode_names, feature_rows, slots = [], [], [], [], [], []
+    # The lookups are timed as one block, timing each of the thousands of calls would slow the batch down
+    lookup = get_matchup_features.__wrapped__
+    with stage('get_matchup_features', calls=sum(min(len(maps), len(modes)) for _, _, maps, modes in series_list)):
+        for i, (team1, team2, maps, modes) in enumerate(series_list):
+            for map_name, mode in zip(maps, modes):
+                feature_row = lookup(team1, team2, map_name, mode, matchup_index, verbose, ratings)
+                if feature_row is None:
+                    results[i].append((map_name, mode, "Data Not Available"))
+                    continue
+                # Remember where this map's prediction goes once the whole batch is scored
+                slots.append((i, len(results[i])))
+                results[i].append((map_name, mode, None))
+                team1s.append(team1)
+                team2s.append(team2)
+                map_names.append(map_name)
+                mode_names.append(mode)
+                feature_rows.append(feature_row)
+
+    probabilities = [[None] * len(series) for series in results]
+    if feature_rows:
+        # Prepare feature matrix for prediction, columns in the same order as feature_cols
+        with stage('encoder_transform'):
+            features = np.column_stack([
+                team_encoder.transform(team1s), team_encoder.transform(team2s),  # Team encodings
+                map_encoder.transform(map_names), mode_encoder.transform(mode_names),  # Map and mode encodings
+                np.vstack(feature_rows),  # K/D, Avg Point, NTK % and NTD % differentials, then any rating differences
+            ])
+
+        n_expected = getattr(model, 'n_features_in_', None)
+        if n_expected is not None and features.shape[1] != n_expected:
+            # The forest would silently ignore extra columns, e.g. ratings passed to a model trained without them
+            raise ValueError(f"The model was trained on {n_expected} features but got {features.shape[1]}, "
+                             f"pass ratings only with a model trained on RATING_FEATURES")
+
+        if hasattr(model, 'feature_names_in_'):
+            # The model was fitted on a DataFrame, so keep its column names to avoid a warning on every call
+            import pandas as pd
+            features = pd.DataFrame(features, columns=model.feature_names_in_)
+
+        # predict() is the class with the highest probability, so one predict_proba call gives us both
+        with stage('model_predict', memory=True):
+            proba = model.predict_proba(features)
+        predictions = model.classes_.take(np.argmax(proba, axis=1))
+        team1_column = list(model.classes_).index(1)
+        for (i, j), prediction, p in zip(slots, predictions, proba[:, team1_column]):
+            map_name, mode, _ = results[i][j]
+            results[i][j] = (map_name, mode, prediction)
+            probabilities[i][j] = p
+
+    if return_proba:
+        return results, probabilities
+    return results
+
+def make_random_series(matchup_index, n_series, seed=0):
+    """ Random (team1, team2, maps, modes) series between teams in matchup_index, with maps that are played in each SERIES_MODES slot. """
+    rng = np.random.default_rng(seed)
+    # A TeamFeatureStore has one row per team, a MatchupIndex one per pair
+    teams = np.unique(matchup_index.teams if hasattr(matchup_index, 'cells') else matchup_index.team_a)
+    maps_by_mode = {mode: np.unique(matchup_index.maps[matchup_index.modes == mode]) for mode in SERIES_MODES}
+    return [(*rng.choice(teams, 2, replace=False).tolist(), [str(rng.choice(maps_by_mode[mode])) for mode in SERIES_MODES],
+             SERIES_MODES) for _ in range(n_series)]
+
+"""The display_results function takes the prediction results and displays them in a user-friendly format, along with determining and announcing the overall winner of the series based on the outcomes of individual maps. Like a real best-of-5, it stops counting once a team has won three maps.
+
+If the matchup data is unavailable, the code will let the user know that It cant make a precise prediction due to lack of matchup data
+"""
+
+def display_results(results, team1, team2):
+    """ Display the predicted results of each map and calculate the overall series winner. """
+    team_wins = {team1: 0, team2: 0}
+    print("\nMatch Prediction Results:")
+    for map, mode, result in results:
+        if max(team_wins.values()) == 3:
+            # Best-of-5: the series is over once a team has three maps, same as the series simulation
+            print(f"{map} ({mode}): Not played, the series is already decided")
+        elif result == "Data Not Available":
+            winner_team = "Data Not Available"
+            print(f"{map} ({mode}): Winner is {winner_team}")
+        else:
+            winner_team = team1 if result == 1 else team2
+            print(f"{map} ({mode}): Winner is {winner_team}")
+            team_wins[winner_team] += 1
+
+    # Calculate series score and winner
+    if team_wins[team1] == team_wins[team2]:
+        # Only possible when some maps have no data, so don't pick a winner
+        print(f"\nSeries is tied {team_wins[team1]}-{team_wins[team2]}, not enough matchup data to pick a winner")
+        return
+    if team_wins[team1] > team_wins[team2]:
+        series_winner = team1
+        series_score = f"{team_wins[team1]}-{team_wins[team2]}"
+    else:
+        series_winner = team2
+        series_score = f"{team_wins[team2]}-{team_wins[team1]}"
+
+    print(f"\nSeries Winner: {series_winner} with a score of {series_score}")
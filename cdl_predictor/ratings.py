@@ -0,0 +1,298 @@
+"""Team ratings
+
+The matchup differentials are season averages, so a team that gets much better or worse late in the season looks the same as it did at the start. `TeamRatings` follows form as results come in:
+
+* An Elo rating for every team, updated after every map it plays
+* An Elo rating for every team on every map and mode, so a team that is strong on one map but weak on another is rated separately
+* The win rate and average point difference over the team's last `FORM_WINDOW` maps on that map and mode
+
+Every update is a handful of dictionary operations, whatever the number of results already seen. Between seasons the Elo ratings are pulled back towards the average, so old results count for less.
+
+`to_table` freezes the current ratings into a `RatingTable`, saved as a `.npz` file next to the model. `get_matchup_features` looks the two teams up in it by dictionary and appends their differences (`RATING_FEATURES`) after the `K/D Diff`, `Avg Point Diff Diff`, `NTK % Diff` and `NTD % Diff` columns.
+
+The ratings are only used by a model trained with `RATING_FEATURES`, as in `benchmark_ratings`. `train_model` doesn't add them yet, so the file written by the `ratings` command isn't read by `predict`, `serve` or `whatif`, and passing it to the shipped model raises a ValueError.
+"""
+
+import time
+from collections import deque
+
+import numpy as np
+
+from .columns import RATING_FEATURES
+from .utils import atomic_path
+
+RATINGS_PATH = 'team_ratings.npz'
+ELO_START = 1500.0
+ELO_K = 20.0
+MAP_ELO_K = 32.0
+FORM_WINDOW = 10
+# Share of a team's distance from the average Elo it keeps into the next season
+SEASON_CARRYOVER = 0.75
+
+def _expected_score(rating, opponent_rating):
+    """ Elo probability that rating beats opponent_rating. """
+    return 1.0 / (1.0 + 10.0 ** ((opponent_rating - rating) / 400.0))
+
+class TeamRatings:
+    """ Elo and rolling form ratings of every team, overall and per map and mode, updated one result at a time. """
+
+    def __init__(self, k=ELO_K, map_k=MAP_ELO_K, window=FORM_WINDOW, carryover=SEASON_CARRYOVER):
+        self.k = k
+        self.map_k = map_k
+        self.window = window
+        self.carryover = carryover
+        self.team_elo = {}
+        self.map_elo = {}
+        # Per (team, map, mode): the last results as (won, point diff), and their running sums
+        self.form = {}
+        self.form_sums = {}
+
+    def _cell_row(self, team, map_name, mode):
+        cell = (team, map_name, mode)
+        played = self.form.get(cell)
+        if not played:
+            return self.map_elo.get(cell, ELO_START), 0.5, 0.0
+        wins, point_diff = self.form_sums[cell]
+        return self.map_elo[cell], wins / len(played), point_diff / len(played)
+
+    def _add_form(self, cell, won, point_diff):
+        played = self.form.get(cell)
+        if played is None:
+            played = self.form[cell] = deque(maxlen=self.window)
+            self.form_sums[cell] = [0.0, 0.0]
+        sums = self.form_sums[cell]
+        if len(played) == self.window:
+            # The oldest result drops out of the window
+            old_won, old_point_diff = played[0]
+            sums[0] -= old_won
+            sums[1] -= old_point_diff
+        played.append((won, point_diff))
+        sums[0] += won
+        sums[1] += point_diff
+
+    def update(self, team1, team2, map_name, mode, team1_won, point_diff):
+        """ Record one map result; point_diff is team1's score minus team2's. """
+        team1_elo = self.team_elo.get(team1, ELO_START)
+        team2_elo = self.team_elo.get(team2, ELO_START)
+        change = self.k * (float(team1_won) - _expected_score(team1_elo, team2_elo))
+        self.team_elo[team1] = team1_elo + change
+        self.team_elo[team2] = team2_elo - change
+
+        cell1, cell2 = (team1, map_name, mode), (team2, map_name, mode)
+        cell1_elo = self.map_elo.get(cell1, ELO_START)
+        cell2_elo = self.map_elo.get(cell2, ELO_START)
+        change = self.map_k * (float(team1_won) - _expected_score(cell1_elo, cell2_elo))
+        self.map_elo[cell1] = cell1_elo + change
+        self.map_elo[cell2] = cell2_elo - change
+
+        self._add_form(cell1, float(team1_won), float(point_diff))
+        self._add_form(cell2, 1.0 - float(team1_won), -float(point_diff))
+
+    def new_season(self):
+        """ Pull every Elo rating part of the way back to the average before a new season starts. """
+        for ratings in (self.team_elo, self.map_elo):
+            if ratings:
+                mean = sum(ratings.values()) / len(ratings)
+                for key, rating in ratings.items():
+                    ratings[key] = mean + self.carryover * (rating - mean)
+
+    def diff(self, team1, team2, map_name, mode):
+        """ RATING_FEATURES for team1 vs team2 on a map and mode from the live ratings. """
+        row1 = self._cell_row(team1, map_name, mode)
+        row2 = self._cell_row(team2, map_name, mode)
+        return np.array([self.team_elo.get(team1, ELO_START) - self.team_elo.get(team2, ELO_START),
+                         row1[0] - row2[0], row1[1] - row2[1], row1[2] - row2[2]])
+
+    def to_table(self):
+        """ Freeze the current ratings into a RatingTable. """
+        cells = sorted(set(self.map_elo) | set(self.form))
+        teams = sorted(self.team_elo)
+        return RatingTable(teams, [self.team_elo[team] for team in teams],
+                           [cell[0] for cell in cells], [cell[1] for cell in cells], [cell[2] for cell in cells],
+                           [self._cell_row(*cell) for cell in cells])
+
+class RatingTable:
+    """ Precomputed team ratings keyed by team and by (team, map, mode), for constant time matchup lookups. """
+
+    def __init__(self, teams, team_elo, cell_teams, cell_maps, cell_modes, cell_values):
+        self.teams = np.asarray(teams, dtype=str)
+        self.team_elo = np.asarray(team_elo, dtype=np.float64)
+        self.cell_teams = np.asarray(cell_teams, dtype=str)
+        self.cell_maps = np.asarray(cell_maps, dtype=str)
+        self.cell_modes = np.asarray(cell_modes, dtype=str)
+        # One row per cell: map Elo, form win rate and form average point difference
+        self.cell_values = np.asarray(cell_values, dtype=np.float64).reshape(-1, 3)
+        self._teams = {team: row for row, team in enumerate(self.teams.tolist())}
+        self._cells = {cell: row for row, cell in enumerate(zip(self.cell_teams.tolist(), self.cell_maps.tolist(),
+                                                                self.cell_modes.tolist()))}
+        self._default_cell = np.array([ELO_START, 0.5, 0.0])
+
+    def __len__(self):
+        return len(self.cell_values)
+
+    def _cell(self, team, map_name, mode):
+        row = self._cells.get((team, map_name, mode))
+        return self._default_cell if row is None else self.cell_values[row]
+
+    def lookup(self, team1, team2, map_name, mode):
+        """ Return RATING_FEATURES for team1 vs team2, or None if either team has no rating. """
+        row1, row2 = self._teams.get(team1), self._teams.get(team2)
+        if row1 is None or row2 is None:
+            return None
+        cell_diff = self._cell(team1, map_name, mode) - self._cell(team2, map_name, mode)
+        return np.concatenate(([self.team_elo[row1] - self.team_elo[row2]], cell_diff))
+
+    def save(self, path=RATINGS_PATH):
+        """ Save the table as plain arrays, written to a temporary file and swapped in with os.replace. """
+        with atomic_path(path, suffix='.npz') as tmp_path:
+            np.savez(tmp_path, teams=self.teams, team_elo=self.team_elo, cell_teams=self.cell_teams,
+                     cell_maps=self.cell_maps, cell_modes=self.cell_modes, cell_values=self.cell_values)
+
+    @classmethod
+    def load(cls, path=RATINGS_PATH):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(arrays['teams'], arrays['team_elo'], arrays['cell_teams'], arrays['cell_maps'],
+                       arrays['cell_modes'], arrays['cell_values'])
+
+"""Match results are one row per map played, with `Season`, `Team 1`, `Team 2`, `Map`, `Mode`, `Team 1 Won` and `Point Diff` (team 1's score minus team 2's) columns, in the order they were played. `replay_results` feeds them through `TeamRatings` and records every map's rating features as they were just before it was played, which is what a model trained on ratings has to learn from."""
+
+def replay_results(results, ratings=None):
+    """ Update ratings with every result in order. Returns the ratings and the pre-match RATING_FEATURES of each row. """
+    ratings = TeamRatings() if ratings is None else ratings
+    features = np.empty((len(results), len(RATING_FEATURES)))
+    season = None
+    rows = zip(results['Season'].tolist(), results['Team 1'].tolist(), results['Team 2'].tolist(),
+               results['Map'].tolist(), results['Mode'].tolist(), results['Team 1 Won'].tolist(),
+               results['Point Diff'].tolist())
+    for i, (row_season, team1, team2, map_name, mode, team1_won, point_diff) in enumerate(rows):
+        if season is not None and row_season != season:
+            ratings.new_season()
+        season = row_season
+        features[i] = ratings.diff(team1, team2, map_name, mode)
+        ratings.update(team1, team2, map_name, mode, team1_won, point_diff)
+    return ratings, features
+
+def build_rating_table(results_path, ratings_path=RATINGS_PATH):
+    """ Replay a CSV of match results and save the final ratings for get_matchup_features. """
+    import pandas as pd
+
+    ratings, _ = replay_results(pd.read_csv(results_path))
+    table = ratings.to_table()
+    table.save(ratings_path)
+    print(f"Saved ratings for {len(table.teams)} teams and {len(table)} team/map/mode cells to {ratings_path}")
+    return table
+
+"""To see whether form helps, we simulate five seasons where each team's strength drifts from week to week, so season-to-date averages fall behind. Two forests are trained on the first four seasons and tested on the fifth: the current 8 features, with the differentials computed from the season so far, and the same 8 plus `RATING_FEATURES`."""
+
+def make_synthetic_seasons(n_seasons=5, n_teams=16, n_weeks=40, drift=0.15, seed=0):
+    """ Simulate map results and box score stats for seasons where team strength drifts week to week. """
+    import pandas as pd
+
+    from .columns import SERIES_MODES
+    from .matchups import make_synthetic_league
+
+    rng = np.random.default_rng(seed)
+    cells = make_synthetic_league(n_teams, seed=seed)
+    teams = cells['Team'].unique()
+    maps_by_mode = cells.groupby('Mode', sort=False)['Map'].unique().to_dict()
+    cell_offset = {cell: rng.normal(0, 0.4) for cell in zip(cells['Team'], cells['Map'], cells['Mode'])}
+    strength = dict(zip(teams, rng.normal(0, 1, n_teams)))
+
+    rows = []
+    for season in range(n_seasons):
+        for week in range(n_weeks):
+            strength = {team: s + rng.normal(0, drift) for team, s in strength.items()}
+            order = rng.permutation(teams)
+            for team1, team2 in zip(order[::2], order[1::2]):
+                for mode in SERIES_MODES:
+                    map_name = rng.choice(maps_by_mode[mode])
+                    delta = (strength[team1] + cell_offset[team1, map_name, mode]
+                             - strength[team2] - cell_offset[team2, map_name, mode])
+                    team1_won = int(rng.random() < 1.0 / (1.0 + np.exp(-delta)))
+                    kills1, kills2 = rng.poisson(90 * np.exp(0.05 * delta)), rng.poisson(90 * np.exp(-0.05 * delta))
+                    rows.append((season, week, team1, team2, map_name, mode, team1_won,
+                                 rng.normal(20 * delta + 15 * (2 * team1_won - 1), 25),
+                                 kills1, kills2, rng.binomial(kills1, 0.7), rng.binomial(kills2, 0.7)))
+    return pd.DataFrame(rows, columns=['Season', 'Week', 'Team 1', 'Team 2', 'Map', 'Mode', 'Team 1 Won', 'Point Diff',
+                                       'Team 1 Kills', 'Team 2 Kills', 'Team 1 NTK', 'Team 2 NTK'])
+
+def _season_to_date_features(results):
+    """ MATCHUP_FEATURES of every result from each team's totals on that map and mode earlier in the season. """
+    import pandas as pd
+
+    # One row per team per map, with that team's kills, deaths, point diff and non-traded kills and deaths
+    sides = []
+    for side, other in (('Team 1', 'Team 2'), ('Team 2', 'Team 1')):
+        sign = 1 if side == 'Team 1' else -1
+        sides.append(pd.DataFrame({
+            'Row': np.arange(len(results)), 'Season': results['Season'], 'Team': results[side],
+            'Map': results['Map'], 'Mode': results['Mode'], 'Maps': 1.0,
+            'Point Diff': sign * results['Point Diff'], 'Kills': results[f'{side} Kills'],
+            'Deaths': results[f'{other} Kills'], 'NTK': results[f'{side} NTK'], 'NTD': results[f'{other} NTK'],
+        }))
+    long = pd.concat(sides, ignore_index=True)
+    totals = ['Maps', 'Point Diff', 'Kills', 'Deaths', 'NTK', 'NTD']
+    # Cumulative totals minus the current map, so each map only sees the ones before it
+    before = long.groupby(['Season', 'Team', 'Map', 'Mode'], sort=False)[totals].cumsum() - long[totals]
+    played = before['Maps'] > 0
+    stats = pd.DataFrame({
+        'K/D': np.where(played, before['Kills'] / before['Deaths'].clip(lower=1), np.nan),
+        'Avg Point Diff': np.where(played, before['Point Diff'] / before['Maps'].clip(lower=1), np.nan),
+        'NTK %': np.where(played, before['NTK'] / before['Kills'].clip(lower=1), np.nan),
+        'NTD %': np.where(played, before['NTD'] / before['Deaths'].clip(lower=1), np.nan),
+    })
+    # A team with no maps yet this season gets the league average
+    stats = stats.fillna(stats.mean())
+    n = len(results)
+    return stats.to_numpy()[:n] - stats.to_numpy()[n:]
+
+def benchmark_ratings(n_seasons=5, n_teams=16, n_weeks=40, n_lookups=2000, seed=0):
+    """ Replay time of the ratings, and test accuracy and prediction latency with and without rating features. """
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    from sklearn.preprocessing import LabelEncoder
+
+    results = make_synthetic_seasons(n_seasons, n_teams, n_weeks, seed=seed)
+    start = time.perf_counter()
+    ratings, rating_features = replay_results(results)
+    replay_seconds = time.perf_counter() - start
+    print(f"Replayed {len(results)} map results over {n_seasons} seasons in {replay_seconds:.2f} s "
+          f"({len(results) / replay_seconds:,.0f} results/s)")
+
+    team_encoder = LabelEncoder().fit(np.concatenate([results['Team 1'], results['Team 2']]))
+    base = np.column_stack([team_encoder.transform(results['Team 1']), team_encoder.transform(results['Team 2']),
+                            LabelEncoder().fit_transform(results['Map']), LabelEncoder().fit_transform(results['Mode']),
+                            _season_to_date_features(results)])
+    y = results['Team 1 Won'].to_numpy()
+    train = results['Season'].to_numpy() < n_seasons - 1
+
+    # Lookups come from the frozen table at serving time, check it agrees with the live ratings
+    table = ratings.to_table()
+    rng = np.random.default_rng(seed)
+    probes = results.iloc[rng.integers(0, len(results), n_lookups)]
+    probe_keys = list(zip(probes['Team 1'], probes['Team 2'], probes['Map'], probes['Mode']))
+    for key in probe_keys[:100]:
+        assert np.allclose(table.lookup(*key), ratings.diff(*key))
+    start = time.perf_counter()
+    for key in probe_keys:
+        table.lookup(*key)
+    lookup_us = (time.perf_counter() - start) / n_lookups * 1e6
+
+    rows = []
+    for name, X in (('8 features', base), ('8 features + ratings', np.column_stack([base, rating_features]))):
+        model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X[train], y[train])
+        X_test = X[~train]
+        single = X_test[:1]
+        model.predict_proba(single)
+        start = time.perf_counter()
+        for _ in range(20):
+            model.predict_proba(single)
+        single_ms = (time.perf_counter() - start) / 20 * 1000
+        start = time.perf_counter()
+        test_predictions = model.predict(X_test)
+        batch_us = (time.perf_counter() - start) / len(X_test) * 1e6
+        rows.append({'Model': name, 'Features': X.shape[1], 'Test Accuracy': accuracy_score(y[~train], test_predictions),
+                     'Single Prediction (ms)': single_ms, 'Batch (us/map)': batch_us,
+                     'Rating Lookup (us)': lookup_us if X.shape[1] > base.shape[1] else 0.0})
+    return pd.DataFrame(rows)
@@ -0,0 +1,200 @@
+"""Prediction server
+
+Running `main()` for every prediction unpickles the model, the encoders and the matchup data from scratch and then waits on `input()`. The prediction server loads everything once with `load_resources()` and keeps it in memory, answering JSON requests over a local HTTP port:
+
+* `POST /predict` with `{"team1": "ATL", "team2": "TX", "maps": [five maps]}` (or a list of them). The modes always follow the `SERIES_MODES` rotation
+* `GET /stats` returns request and batch counts along with p50/p99 latency in milliseconds
+* `GET /metrics` returns the stage timings from `instrumentation` in the Prometheus text format, when instrumentation is enabled
+
+Requests that arrive at almost the same time are collected by a `PredictionBatcher` and scored together with one `predict_series_batch` call.
+
+Each response lists every map with its win probability. Like `display_results`, `map_wins` stops counting once a team has won three maps, and the maps after that have `"played": false`. `series_win_probability` is team 1's chance of winning the series from `exact_series_distribution`, or null when no map has matchup data.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .bundle import load_resources
+from .columns import SERIES_MODES
+from .instrumentation import prometheus_text
+from .prediction import predict_series_batch
+from .simulation import exact_series_distribution
+
+class PredictionBatcher:
+    """ Collect series submitted from many threads and score them in micro-batches on one worker thread. """
+
+    def __init__(self, resources, max_batch_size=256, max_wait=0.002, latency_window=10000):
+        self.model, self.team_encoder, self.map_encoder, self.mode_encoder, self.matchup_index = resources
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.requests = 0
+        self.batches = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, series):
+        """ Queue a (team1, team2, maps, modes) series and return a Future for its (results, probabilities). """
+        future = Future()
+        self._queue.put((series, future))
+        return future
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(seconds)
+
+    def stats(self):
+        """ Return request and batch counters plus p50/p99 latency over the recent requests. """
+        with self._lock:
+            latencies = np.array(self._latencies)
+            requests, batches = self.requests, self.batches
+        stats = {'requests': requests, 'batches': batches, 'p50_ms': None, 'p99_ms': None}
+        if len(latencies):
+            stats['p50_ms'], stats['p99_ms'] = (np.percentile(latencies, [50, 99]) * 1000).tolist()
+        return stats
+
+    def _run(self):
+        while True:
+            # Wait for the first series, then give the others a short window to join the batch
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                results, probabilities = predict_series_batch(
+                    self.model, self.team_encoder, self.map_encoder, self.mode_encoder,
+                    [series for series, _ in batch], self.matchup_index, return_proba=True, verbose=False)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+            for (_, future), series_results, series_probabilities in zip(batch, results, probabilities):
+                future.set_result((series_results, series_probabilities))
+
+def _parse_series_request(payload):
+    """ Validate one JSON series request and return it as a (team1, team2, maps, modes) tuple. """
+    if not isinstance(payload, dict):
+        raise ValueError("Each series must be a JSON object")
+    team1, team2, maps = payload.get('team1'), payload.get('team2'), payload.get('maps')
+    if not isinstance(team1, str) or not isinstance(team2, str):
+        raise ValueError("'team1' and 'team2' must be strings")
+    if not isinstance(maps, list) or len(maps) != len(SERIES_MODES) or not all(isinstance(m, str) for m in maps):
+        raise ValueError(f"'maps' must be a list of {len(SERIES_MODES)} map names")
+    return team1, team2, maps, SERIES_MODES
+
+def _format_series_response(series, results, probabilities):
+    team1, team2, _, _ = series
+    maps = []
+    team_wins = {team1: 0, team2: 0}
+    for (map_name, mode, result), probability in zip(results, probabilities):
+        # Best-of-5: the series is over once a team has three maps, same as display_results
+        played = max(team_wins.values()) < 3
+        winner_team = None
+        if played and result != "Data Not Available":
+            winner_team = team1 if result == 1 else team2
+            team_wins[winner_team] += 1
+        maps.append({'map': map_name, 'mode': mode, 'played': played, 'winner': winner_team,
+                     'team1_win_probability': None if probability is None else float(probability)})
+
+    map_probabilities = np.array([np.nan if p is None else p for p in probabilities], dtype=np.float64)
+    series_win = None
+    if not np.isnan(map_probabilities).all():
+        series_win = float(exact_series_distribution(map_probabilities)[:3].sum())
+    return {'team1': team1, 'team2': team2, 'maps': maps, 'map_wins': team_wins, 'series_win_probability': series_win}
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    """ JSON request handler for the prediction server. """
+
+    batcher = None  # Set by make_prediction_server
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.batcher.stats())
+        elif self.path == '/metrics':
+            data = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        start = time.perf_counter()
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if not isinstance(payload, (dict, list)):
+                raise ValueError("The body must be a series object or a list of series objects")
+            single = isinstance(payload, dict)
+            series_list = [_parse_series_request(p) for p in ([payload] if single else payload)]
+        except ValueError as e:  # json.JSONDecodeError is a ValueError too
+            self._send_json(400, {'error': str(e)})
+            return
+
+        futures = [self.batcher.submit(series) for series in series_list]
+        try:
+            body = [_format_series_response(series, *future.result()) for series, future in zip(series_list, futures)]
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self.batcher.record_latency(time.perf_counter() - start)
+        self._send_json(200, body[0] if single else body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet, the /stats endpoint has the counters
+
+class PredictionServer(ThreadingHTTPServer):
+    """ Threaded HTTP server with a listen backlog large enough for a burst of matchweek requests. """
+
+    request_queue_size = 128
+
+def make_prediction_server(resources=None, host='127.0.0.1', port=8000, **batcher_options):
+    """ Create a prediction server with the model resources preloaded. Use port=0 to pick a free port. """
+    if resources is None:
+        resources = load_resources()
+    handler = type('BoundPredictionRequestHandler', (PredictionRequestHandler,),
+                   {'batcher': PredictionBatcher(resources, **batcher_options)})
+    return PredictionServer((host, port), handler)
+
+def serve(host='127.0.0.1', port=8000):
+    """ Load the resources once and serve predictions until interrupted. """
+    server = make_prediction_server(host=host, port=port)
+    print(f"Serving predictions on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,401 @@
+"""Series and season simulation
+
+Turns the per-map win probabilities of the model into odds for a whole series, and then for a whole season and its playoffs.
+"""
+
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .columns import SERIES_MODES
+from .prediction import predict_series_batch
+
+"""# Simulating the series
+
+`display_results` only sees one hard win/loss per map, so a map the model calls 51-49 counts the same as one it calls 99-1. Instead we can take the per-map win probabilities from `predict_proba` and simulate the series many times:
+
+* Each simulated series draws a win or loss for all five maps at once, packed into a 5-bit number (bit i set if team 1 wins map i)
+* There are only 32 possible patterns, and the series score for each one (stopping as soon as a team reaches 3 wins) is worked out once in `_SCORE_BY_PATTERN`
+* Counting the patterns with `np.bincount` then gives the distribution over the exact series scores
+
+Maps without matchup data have no probability, so we treat them as a coin flip.
+
+`exact_series_distribution` sums the probability of all 32 patterns instead, which is what `main()` shows for the one series it predicts, without any sampling noise. It doesn't print odds at all when none of the maps has data. The simulation is checked against the exact distribution in the tests.
+"""
+
+# Series scores from team 1's point of view, team 1 wins the first three
+SERIES_SCORES = ['3-0', '3-1', '3-2', '2-3', '1-3', '0-3']
+
+def _series_score_index(pattern):
+    """ Play out a 5-bit map win pattern until one team reaches 3 wins and return its SERIES_SCORES index. """
+    team1_wins = team2_wins = 0
+    for i in range(5):
+        if pattern >> i & 1:
+            team1_wins += 1
+        else:
+            team2_wins += 1
+        if team1_wins == 3 or team2_wins == 3:
+            break
+    return SERIES_SCORES.index(f"{team1_wins}-{team2_wins}")
+
+_SCORE_BY_PATTERN = np.array([_series_score_index(pattern) for pattern in range(32)], dtype=np.intp)
+
+def simulate_series(map_probabilities, n_simulations=100_000, seed=None, chunk_size=1_000_000):
+    """ Monte Carlo the best-of-5 score distribution from team 1's per-map win probabilities.
+
+    map_probabilities has shape (5,) for one series or (n_series, 5) for many. Returns the probability
+    of each score in SERIES_SCORES, with shape (6,) or (n_series, 6).
+    """
+    probabilities = np.asarray(map_probabilities, dtype=np.float64)
+    single = probabilities.ndim == 1
+    probabilities = np.atleast_2d(probabilities)
+    probabilities = np.where(np.isnan(probabilities), 0.5, probabilities)
+
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((len(probabilities), len(SERIES_SCORES)), dtype=np.int64)
+    for s, series_probabilities in enumerate(probabilities):
+        remaining = n_simulations
+        while remaining:
+            n = min(remaining, chunk_size)
+            # Pack the five map results of every simulated series into one 5-bit pattern
+            wins = rng.random((n, 5), dtype=np.float32) < series_probabilities
+            patterns = np.packbits(wins, axis=1, bitorder='little')[:, 0]
+            pattern_counts = np.bincount(patterns, minlength=32)
+            counts[s] += np.bincount(_SCORE_BY_PATTERN, weights=pattern_counts, minlength=len(SERIES_SCORES)).astype(np.int64)
+            remaining -= n
+
+    score_probabilities = counts / n_simulations
+    return score_probabilities[0] if single else score_probabilities
+
+def exact_series_distribution(map_probabilities):
+    """ Exact score distribution by summing the probability of all 32 map win patterns.
+
+    Accepts the same (5,) or (n_series, 5) shapes as simulate_series.
+    """
+    p = np.asarray(map_probabilities, dtype=np.float64)
+    p = np.where(np.isnan(p), 0.5, p)[..., None, :]
+    wins = (np.arange(32)[:, None] >> np.arange(5)) & 1
+    pattern_probabilities = np.prod(np.where(wins, p, 1 - p), axis=-1)
+    return pattern_probabilities @ np.eye(len(SERIES_SCORES))[_SCORE_BY_PATTERN]
+
+def display_series_simulation(score_probabilities, team1, team2):
+    """ Display the series win probabilities and the chance of each exact score. """
+    team1_win = score_probabilities[:3].sum()
+    print(f"\nSeries Win Probability: {team1} {team1_win:.1%}, {team2} {1 - team1_win:.1%}")
+    for score, probability in zip(SERIES_SCORES, score_probabilities):
+        print(f"  {team1} {score} {team2}: {probability:.1%}")
+
+def benchmark_series_simulator(n_simulations=1_000_000, repeats=3, seed=0):
+    """ Time simulate_series and compare its result against the exact distribution. """
+    map_probabilities = np.random.default_rng(seed).uniform(0.2, 0.8, 5)
+    start = time.perf_counter()
+    for i in range(repeats):
+        simulated = simulate_series(map_probabilities, n_simulations, seed=seed + i)
+    elapsed = (time.perf_counter() - start) / repeats
+    return {'Series per second': n_simulations / elapsed,
+            'Max error vs exact': float(np.abs(simulated - exact_series_distribution(map_probabilities)).max())}
+
+"""# Season and playoff projections
+
+Instead of predicting one series at a time, we can project the rest of the season for the whole league:
+
+1. **Scoring every pair once.** Every pair of teams is scored on every map and mode cell in one `predict_series_batch` call. The maps of a future series aren't known yet, so each mode slot of the series uses the average win probability over the maps played in that mode. `exact_series_distribution` then turns the five slot probabilities into a series win probability, giving a matrix of head-to-head odds.
+2. **Simulating the season.** Every remaining fixture is played out for many simulated seasons at once, and the teams are ranked by wins (ties broken at random).
+3. **Simulating the playoffs.** The top seeds play a single elimination bracket (1 v 8, 4 v 5, 2 v 7, 3 v 6 for eight teams) using the same head-to-head odds.
+
+The simulations are split across a process pool. The workers only need the head-to-head matrix and the fixture list, which are put in shared memory once instead of being pickled into every worker.
+"""
+
+def matchup_cells(matchup_index):
+    """ Return the teams and the (map, mode) cells present in the matchup index, in first-seen order. """
+    if hasattr(matchup_index, 'cells'):
+        # A TeamFeatureStore keeps its teams and cells directly
+        return list(dict.fromkeys(matchup_index.teams.tolist())), list(matchup_index.cells)
+    teams = list(dict.fromkeys(np.concatenate([matchup_index.team_a, matchup_index.team_b]).tolist()))
+    cells = list(dict.fromkeys(zip(matchup_index.maps.tolist(), matchup_index.modes.tolist())))
+    return teams, cells
+
+def head_to_head_probabilities(model, team_encoder, map_encoder, mode_encoder, matchup_index, teams=None, modes=SERIES_MODES):
+    """ Series win probability of every team against every other team, from one batched scoring pass.
+
+    Returns a (n_teams, n_teams) array where entry [i, j] is the chance team i beats team j in a series.
+    """
+    all_teams, cells = matchup_cells(matchup_index)
+    teams = all_teams if teams is None else list(teams)
+    pairs = list(itertools.combinations(range(len(teams)), 2))
+    cell_maps = [map_name for map_name, _ in cells]
+    cell_modes = [mode for _, mode in cells]
+
+    # Score each pair on every map and mode cell in a single batch
+    series_list = [(teams[a], teams[b], cell_maps, cell_modes) for a, b in pairs]
+    _, probabilities = predict_series_batch(model, team_encoder, map_encoder, mode_encoder, series_list, matchup_index,
+                                            return_proba=True, verbose=False)
+    cell_probabilities = np.array([[np.nan if p is None else p for p in row] for row in probabilities]).reshape(len(pairs), len(cells))
+
+    # Average over the maps played in each mode of the series, skipping maps without data
+    cell_modes = np.array(cell_modes)
+    slot_probabilities = np.full((len(pairs), len(modes)), np.nan)
+    for slot, mode in enumerate(modes):
+        in_mode = cell_probabilities[:, cell_modes == mode]
+        has_data = ~np.isnan(in_mode).all(axis=1)
+        slot_probabilities[has_data, slot] = np.nanmean(in_mode[has_data], axis=1)
+
+    series_win = exact_series_distribution(slot_probabilities)[:, :3].sum(axis=1)
+    head_to_head = np.full((len(teams), len(teams)), 0.5)
+    a_idx, b_idx = np.array(pairs, dtype=np.intp).reshape(-1, 2).T
+    head_to_head[a_idx, b_idx] = series_win
+    head_to_head[b_idx, a_idx] = 1 - series_win
+    return head_to_head
+
+def _bracket_order(n_teams):
+    """ Seed order for a single elimination bracket so that seed 1 meets seed n in the first round. """
+    order = [0]
+    while len(order) < n_teams:
+        size = 2 * len(order)
+        order = [seed for s in order for seed in (s, size - 1 - s)]
+    return order
+
+def _simulate_season_chunk(head_to_head, fixtures, base_wins, n_simulations, playoff_teams, seed):
+    """ Simulate n_simulations seasons and playoffs and return the summed place, final and title counts. """
+    rng = np.random.default_rng(seed)
+    n_teams = len(head_to_head)
+    team_a, team_b = fixtures[:, 0], fixtures[:, 1]
+    fixture_probabilities = head_to_head[team_a, team_b]
+
+    # Fixture results for every simulated season, then each team's total wins
+    team_a_won = rng.random((n_simulations, len(fixtures))) < fixture_probabilities
+    wins = np.tile(base_wins.astype(np.float64), (n_simulations, 1))
+    incidence_a = np.zeros((len(fixtures), n_teams))
+    incidence_a[np.arange(len(fixtures)), team_a] = 1
+    incidence_b = np.zeros((len(fixtures), n_teams))
+    incidence_b[np.arange(len(fixtures)), team_b] = 1
+    wins += team_a_won @ incidence_a + ~team_a_won @ incidence_b
+
+    # Rank by wins, with a random fraction added to break ties
+    standings = np.argsort(-(wins + rng.random(wins.shape)), axis=1)
+    place_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    np.add.at(place_counts, (standings, np.arange(n_teams)), 1)
+
+    # Play the bracket round by round, the winners of neighbouring matches meet in the next round
+    bracket = standings[:, _bracket_order(playoff_teams)]
+    final_counts = np.zeros(n_teams, dtype=np.int64)
+    while bracket.shape[1] > 1:
+        if bracket.shape[1] == 2:
+            np.add.at(final_counts, bracket.ravel(), 1)
+        high, low = bracket[:, 0::2], bracket[:, 1::2]
+        high_won = rng.random(high.shape) < head_to_head[high, low]
+        bracket = np.where(high_won, high, low)
+    champion_counts = np.bincount(bracket[:, 0], minlength=n_teams)
+    return place_counts, final_counts, champion_counts, wins.sum(axis=0)
+
+_shared_season = {}
+
+def _share_array(array):
+    """ Copy an array into a new shared memory block and return the block and how to attach to it. """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+def _attach_season_arrays(specs):
+    """ Process pool initializer: attach read-only views of the shared season arrays. """
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        view = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        view.flags.writeable = False
+        _shared_season[name] = (block, view)
+
+def _simulate_shared_season_chunk(n_simulations, playoff_teams, seed):
+    return _simulate_season_chunk(_shared_season['head_to_head'][1], _shared_season['fixtures'][1],
+                                  _shared_season['base_wins'][1], n_simulations, playoff_teams, seed)
+
+def project_season(head_to_head, teams, fixtures=None, current_wins=None, n_simulations=10000, playoff_teams=8,
+                   workers=1, chunk_size=2500, seed=0):
+    """ Simulate the remaining fixtures and the playoffs and return a standings probability table.
+
+    fixtures is a list of (team1, team2) series still to be played, every pair once by default.
+    current_wins maps team to series wins so far.
+    """
+    import pandas as pd
+
+    teams = list(teams)
+    if playoff_teams > len(teams) or playoff_teams & (playoff_teams - 1):
+        raise ValueError("playoff_teams must be a power of two no larger than the number of teams")
+    position = {team: i for i, team in enumerate(teams)}
+    if fixtures is None:
+        fixtures = itertools.combinations(teams, 2)
+    fixtures = np.array([(position[a], position[b]) for a, b in fixtures], dtype=np.intp).reshape(-1, 2)
+    base_wins = np.array([(current_wins or {}).get(team, 0) for team in teams], dtype=np.float64)
+    head_to_head = np.ascontiguousarray(head_to_head, dtype=np.float64)
+
+    # Split the simulations into chunks, each with its own random stream
+    chunks = [min(chunk_size, n_simulations - start) for start in range(0, n_simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    if workers == 1:
+        chunk_results = [_simulate_season_chunk(head_to_head, fixtures, base_wins, n, playoff_teams, s)
+                         for n, s in zip(chunks, seeds)]
+    else:
+        blocks, specs = {}, {}
+        for name, array in (('head_to_head', head_to_head), ('fixtures', fixtures), ('base_wins', base_wins)):
+            blocks[name], specs[name] = _share_array(array)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_season_arrays, initargs=(specs,)) as pool:
+                chunk_results = list(pool.map(_simulate_shared_season_chunk, chunks, [playoff_teams] * len(chunks), seeds))
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+    place_counts, final_counts, champion_counts, total_wins = (sum(parts) for parts in zip(*chunk_results))
+    table = pd.DataFrame(place_counts / n_simulations, index=teams,
+                         columns=[f'Place {i + 1}' for i in range(len(teams))])
+    table.insert(0, 'Avg Wins', total_wins / n_simulations)
+    table['Make Playoffs'] = table[[f'Place {i + 1}' for i in range(playoff_teams)]].sum(axis=1)
+    table['Reach Final'] = final_counts / n_simulations
+    table['Champion'] = champion_counts / n_simulations
+    return table.sort_values('Avg Wins', ascending=False)
+
+def benchmark_season_projection(head_to_head, teams, worker_counts=(1, 4, 16), n_simulations=200000, **options):
+    """ Wall-clock time of project_season for each number of workers. """
+    import pandas as pd
+
+    results = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        project_season(head_to_head, teams, n_simulations=n_simulations, workers=workers, **options)
+        results.append({'Workers': workers, 'Simulations': n_simulations, 'Seconds': time.perf_counter() - start})
+    return pd.DataFrame(results)
+
+"""# What-if veto explorer
+
+`get_user_input` asks for one set of five maps, so comparing veto strategies means re-running `main()` for every combination. `explore_vetoes` scores every legal map assignment of a series between two teams at once:
+
+* A legal assignment fills each slot of the `SERIES_MODES` rotation with a map that is played in that slot's mode (so Terminal only lands in SND slots, as in `unique_maps_modes`), and never plays the same map twice in one mode
+* There are thousands of assignments but only about 20 map and mode cells, so the win probability of each cell is predicted once, in a single `predict_series_batch` call, and memoized in a dict keyed by (team1, team2, map, mode). Passing the same dict to later calls reuses it across pairs and calls
+* Each assignment then just picks its five cell probabilities, and `exact_series_distribution` turns all of them into series win probabilities in one vectorized call
+
+Only the cells both teams have data on are used by default. A cell without data can only be scored as a coin flip, and a coin flip would outrank the model's real predictions for the weaker team. With `include_missing` those cells are used too, but every assignment with a coin flip is ranked after all the assignments without one.
+"""
+
+def legal_map_assignments(maps_modes, modes=SERIES_MODES):
+    """ Every way to fill the mode slots with maps played in that mode, without repeating a map within a mode.
+
+    maps_modes is a DataFrame with 'Map' and 'Mode' columns, as returned by unique_maps_modes, or (map, mode) pairs.
+    Returns the list of (map, mode) cells and an (n_assignments, len(modes)) array of indices into it.
+    """
+    if hasattr(maps_modes, 'columns'):
+        maps_modes = zip(maps_modes['Map'], maps_modes['Mode'])
+    cells = list(dict.fromkeys((str(map_name), str(mode)) for map_name, mode in maps_modes))
+
+    # The maps of the slots of one mode are an ordered pick without repeats, the modes are combined independently
+    slot_choices = []
+    for mode in dict.fromkeys(modes):
+        slots = [slot for slot, slot_mode in enumerate(modes) if slot_mode == mode]
+        options = [c for c, (_, cell_mode) in enumerate(cells) if cell_mode == mode]
+        picks = np.array(list(itertools.permutations(options, len(slots))), dtype=np.intp).reshape(-1, len(slots))
+        slot_choices.append((slots, picks))
+
+    grids = np.meshgrid(*[np.arange(len(picks)) for _, picks in slot_choices], indexing='ij')
+    assignments = np.empty((grids[0].size, len(modes)), dtype=np.intp)
+    for grid, (slots, picks) in zip(grids, slot_choices):
+        assignments[:, slots] = picks[grid.ravel()]
+    return cells, assignments
+
+def cell_win_probabilities(model, team_encoder, map_encoder, mode_encoder, matchup_index, team1, team2, cells, cache=None):
+    """ team1's win probability against team2 on each (map, mode) cell, NaN where there is no matchup data.
+
+    cache is a dict keyed by (team1, team2, map, mode). Only the cells missing from it are predicted, and they are added.
+    """
+    cache = {} if cache is None else cache
+    missing = [(map_name, mode) for map_name, mode in cells if (team1, team2, map_name, mode) not in cache]
+    if missing:
+        series_list = [(team1, team2, [map_name for map_name, _ in missing], [mode for _, mode in missing])]
+        _, probabilities = predict_series_batch(model, team_encoder, map_encoder, mode_encoder, series_list,
+                                                matchup_index, return_proba=True, verbose=False)
+        for (map_name, mode), p in zip(missing, probabilities[0]):
+            cache[team1, team2, map_name, mode] = np.nan if p is None else p
+    return np.array([cache[team1, team2, map_name, mode] for map_name, mode in cells], dtype=np.float64)
+
+def explore_vetoes(model, team_encoder, map_encoder, mode_encoder, matchup_index, team1, team2, maps_modes=None,
+                   modes=SERIES_MODES, cache=None, include_missing=False):
+    """ Rank every legal map assignment of a team1 vs team2 series by team1's series win probability.
+
+    maps_modes defaults to the map and mode cells in matchup_index. Only the cells both teams have matchup data on
+    are used, unless include_missing is set. Those maps then count as a coin flip, the number of them in each
+    assignment is in the 'Maps Without Data' column, and assignments are ranked by that number first.
+    """
+    import pandas as pd
+
+    if maps_modes is None:
+        maps_modes = matchup_cells(matchup_index)[1]
+    if hasattr(maps_modes, 'columns'):
+        maps_modes = zip(maps_modes['Map'], maps_modes['Mode'])
+    cells = list(dict.fromkeys((str(map_name), str(mode)) for map_name, mode in maps_modes))
+    probabilities = cell_win_probabilities(model, team_encoder, map_encoder, mode_encoder, matchup_index, team1, team2,
+                                           cells, cache)
+    if not include_missing:
+        cells = [cell for cell, p in zip(cells, probabilities) if not np.isnan(p)]
+        probabilities = probabilities[~np.isnan(probabilities)]
+    cells, assignments = legal_map_assignments(cells, modes)
+
+    slot_probabilities = probabilities[assignments]
+    series_win = exact_series_distribution(slot_probabilities)[:, :3].sum(axis=1)
+    n_missing = np.isnan(slot_probabilities).sum(axis=1)
+    # Assignments with coin flips never compete with the ones the model predicted in full
+    order = np.lexsort((-series_win, n_missing))
+    cell_maps = np.array([map_name for map_name, _ in cells], dtype=object)
+    ranking = pd.DataFrame({f'Map {slot + 1} ({mode})': cell_maps[assignments[order, slot]]
+                            for slot, mode in enumerate(modes)})
+    ranking['Series Win'] = series_win[order]
+    ranking['Maps Without Data'] = n_missing[order]
+    return ranking
+
+def display_veto_ranking(ranking, team1, team2, top=5):
+    """ Display the map assignments that most and least favour team1, then any with coin flips on their own. """
+    map_columns = [col for col in ranking.columns if col.startswith('Map ')]
+    predicted = ranking[ranking['Maps Without Data'] == 0]
+    with_missing = ranking[ranking['Maps Without Data'] > 0]
+    print(f"\n{len(predicted)} legal map assignments for {team1} vs {team2} with data for both teams")
+    if predicted.empty:
+        print("Not enough data to fill every slot of the series")
+    sections = [(f"Best for {team1}", predicted.head(top)), (f"Best for {team2}", predicted.tail(top)[::-1])]
+    if not with_missing.empty:
+        sections.append((f"{len(with_missing)} more with maps without data, scored as coin flips", with_missing.head(top)))
+    for title, rows in sections:
+        if rows.empty:
+            continue
+        print(f"\n{title}:")
+        for _, row in rows.iterrows():
+            coin_flips = f" ({row['Maps Without Data']} without data)" if row['Maps Without Data'] else ""
+            print(f"  {team1} {row['Series Win']:.1%}: " + ", ".join(row[map_columns]) + coin_flips)
+
+def benchmark_veto_explorer(resources=None, team1=None, team2=None, repeats=3):
+    """ Time explore_vetoes against scoring every assignment as its own series in one predict_series_batch call. """
+    from .bundle import load_resources
+
+    model, team_encoder, map_encoder, mode_encoder, matchup_index = resources or load_resources()
+    teams, cells = matchup_cells(matchup_index)
+    team1, team2 = team1 or teams[0], team2 or teams[1]
+    encoders = (team_encoder, map_encoder, mode_encoder)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        ranking = explore_vetoes(model, *encoders, matchup_index, team1, team2, include_missing=True)
+    explorer_time = (time.perf_counter() - start) / repeats
+
+    # Without the memo every map of every assignment is looked up and predicted
+    _, assignments = legal_map_assignments(cells)
+    start = time.perf_counter()
+    series_list = [(team1, team2, [cells[c][0] for c in row], list(SERIES_MODES)) for row in assignments.tolist()]
+    _, probabilities = predict_series_batch(model, *encoders, series_list, matchup_index, return_proba=True,
+                                            verbose=False)
+    slot_probabilities = np.array([[np.nan if p is None else p for p in row] for row in probabilities])
+    series_win = exact_series_distribution(slot_probabilities)[:, :3].sum(axis=1)
+    per_series_time = time.perf_counter() - start
+
+    return {'Assignments': len(assignments), 'Cells scored': len(cells), 'Per series (s)': per_series_time,
+            'Explorer (s)': explorer_time, 'Speedup': per_series_time / explorer_time,
+            'Max difference': float(np.abs(np.sort(series_win) - np.sort(ranking['Series Win'].to_numpy())).max())}
@@ -0,0 +1,187 @@
+"""Streaming aggregation of raw match logs
+
+The workbook only has season averages. To build the same team data from per-match logs covering several seasons, which can be tens of millions of rows, `aggregate_match_logs` reads the logs in fixed-size chunks and keeps running totals for every team, map and mode:
+
+* Each row of a log is one team's result on one map, with the columns in `MATCH_LOG_COLUMNS`
+* Every chunk is reduced to per team/map/mode sums (maps played, wins, point difference, kills, deaths, non-traded kills and deaths) and added to the running totals, then dropped
+* At the end the totals are turned into `Win %`, `Avg Point Diff`, `K/D`, `NTK %` and `NTD %`, in the same layout as `combined_team_data`, so the result goes straight into `build_matchup_frame`
+
+Only one chunk and the totals are ever in memory, so memory stays flat however long the logs are. `max_rss_mb` caps the process' resident memory: the chunk size is shrunk to fit under the cap, and a `MemoryError` is raised if the cap is still exceeded.
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .utils import current_rss_bytes, peak_rss_bytes, run_python
+
+# One row per team per map played
+MATCH_LOG_COLUMNS = ['Team', 'Map', 'Mode', 'Won', 'Points For', 'Points Against', 'Kills', 'Deaths',
+                     'Non-Traded Kills', 'Non-Traded Deaths']
+MATCH_LOG_DTYPES = {'Team': 'category', 'Map': 'category', 'Mode': 'category', 'Won': 'int8', 'Points For': 'int32',
+                    'Points Against': 'int32', 'Kills': 'int32', 'Deaths': 'int32', 'Non-Traded Kills': 'int32',
+                    'Non-Traded Deaths': 'int32'}
+CHUNK_ROWS = 500_000
+
+# Rows read to estimate the memory a chunk needs when a peak RSS cap is set
+_PROBE_ROWS = 10_000
+# Parsing and grouping a chunk needs a few times the memory of the parsed chunk itself
+_CHUNK_WORKING_SET = 4
+
+def _is_parquet(path):
+    return path.endswith(('.parquet', '.pq'))
+
+def iter_match_log_chunks(path, chunk_rows=CHUNK_ROWS):
+    """ Yield a match log (CSV, optionally compressed, or Parquet) as DataFrames of at most chunk_rows rows. """
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=MATCH_LOG_COLUMNS):
+            yield batch.to_pandas(strings_to_categorical=True).astype(MATCH_LOG_DTYPES)
+    else:
+        with pd.read_csv(path, usecols=MATCH_LOG_COLUMNS, dtype=MATCH_LOG_DTYPES, chunksize=chunk_rows) as reader:
+            yield from reader
+
+def _current_rss_mb():
+    """ Resident memory of this process in MB, or its peak if the current value isn't available. """
+    rss = current_rss_bytes()
+    return (peak_rss_bytes() if rss is None else rss) / 2**20
+
+def chunk_rows_for_budget(path, max_rss_mb, chunk_rows=CHUNK_ROWS):
+    """ Largest chunk size up to chunk_rows whose working set fits between the current RSS and max_rss_mb. """
+    headroom_mb = max_rss_mb - _current_rss_mb()
+    if headroom_mb <= 0:
+        raise MemoryError(f"Already using {_current_rss_mb():.0f} MB, over the {max_rss_mb} MB cap before reading {path}")
+
+    probe = next(iter_match_log_chunks(path, _PROBE_ROWS), None)
+    if probe is None or probe.empty:
+        return chunk_rows
+    bytes_per_row = probe.memory_usage(deep=True).sum() / len(probe) * _CHUNK_WORKING_SET
+    fitted_rows = int(headroom_mb * 2**20 / bytes_per_row)
+    if fitted_rows < _PROBE_ROWS:
+        raise MemoryError(f"Only {headroom_mb:.0f} MB left under the {max_rss_mb} MB cap, not enough to stream {path}")
+    return min(chunk_rows, fitted_rows)
+
+class MatchLogAggregator:
+    """ Running per team/map/mode totals of match logs, fed one chunk at a time. """
+
+    _KEYS = ['Team', 'Map', 'Mode']
+
+    def __init__(self):
+        self.totals = None
+        self.rows = 0
+
+    def update(self, chunk):
+        """ Add a chunk of match log rows to the running totals. """
+        sums = pd.DataFrame({
+            'Team': chunk['Team'], 'Map': chunk['Map'], 'Mode': chunk['Mode'],
+            'Maps Played': np.ones(len(chunk), dtype=np.int64),
+            'Wins': chunk['Won'].astype(np.int64),
+            'Point Diff': chunk['Points For'].astype(np.int64) - chunk['Points Against'].astype(np.int64),
+            'Kills': chunk['Kills'].astype(np.int64),
+            'Deaths': chunk['Deaths'].astype(np.int64),
+            'Non-Traded Kills': chunk['Non-Traded Kills'].astype(np.int64),
+            'Non-Traded Deaths': chunk['Non-Traded Deaths'].astype(np.int64),
+        }).groupby(self._KEYS, sort=False, observed=True).sum()
+        # The key categories differ from chunk to chunk, so align on plain strings
+        sums.index = sums.index.set_levels([level.astype(str) for level in sums.index.levels])
+        self.totals = sums if self.totals is None else self.totals.add(sums, fill_value=0).astype(np.int64)
+        self.rows += len(chunk)
+
+    def team_data(self):
+        """ Return the totals as a combined_team_data-shaped DataFrame. """
+        if self.totals is None:
+            raise ValueError("No match log rows have been aggregated")
+        totals = self.totals.sort_index().reset_index()
+        maps_played = totals['Maps Played']
+        return pd.DataFrame({
+            'Map': totals['Map'],
+            'Mode': totals['Mode'],
+            'Wins': totals['Wins'].astype(float),
+            'Losses': (maps_played - totals['Wins']).astype(float),
+            'Win %': totals['Wins'] / maps_played,
+            'Avg Point Diff': totals['Point Diff'] / maps_played,
+            'K/D': totals['Kills'] / totals['Deaths'].clip(lower=1),
+            'NTK %': totals['Non-Traded Kills'] / totals['Kills'].clip(lower=1),
+            'NTD %': totals['Non-Traded Deaths'] / totals['Deaths'].clip(lower=1),
+            'Team': totals['Team'],
+        })
+
+def aggregate_match_logs(paths, chunk_rows=CHUNK_ROWS, max_rss_mb=None):
+    """ Stream one or more match logs and return the per team/map/mode stats, shaped like combined_team_data. """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    aggregator = MatchLogAggregator()
+    for path in map(os.fspath, paths):
+        path_chunk_rows = chunk_rows if max_rss_mb is None else chunk_rows_for_budget(path, max_rss_mb, chunk_rows)
+        for chunk in iter_match_log_chunks(path, path_chunk_rows):
+            aggregator.update(chunk)
+            del chunk
+            if max_rss_mb is not None and _current_rss_mb() > max_rss_mb:
+                raise MemoryError(f"Resident memory {_current_rss_mb():.0f} MB went over the {max_rss_mb} MB cap "
+                                  f"while streaming {path}, try a smaller chunk_rows")
+    return aggregator.team_data()
+
+"""To check that memory stays flat we write synthetic match logs of growing length, and stream each one in a fresh interpreter that reports its own peak resident memory."""
+
+def write_synthetic_match_log(path, n_rows, n_teams=12, chunk_rows=CHUNK_ROWS, seed=0):
+    """ Write n_rows of random match log rows to a CSV or Parquet file, a chunk at a time. """
+    from .matchups import make_synthetic_league
+
+    cells = make_synthetic_league(n_teams, seed=seed)[['Team', 'Map', 'Mode']]
+    rng = np.random.default_rng(seed)
+    writer = None
+    try:
+        for start in range(0, n_rows, chunk_rows):
+            n = min(chunk_rows, n_rows - start)
+            picks = cells.iloc[rng.integers(0, len(cells), n)].reset_index(drop=True)
+            kills = rng.poisson(90, n)
+            deaths = rng.poisson(90, n)
+            chunk = pd.DataFrame({
+                'Team': picks['Team'], 'Map': picks['Map'], 'Mode': picks['Mode'],
+                'Won': rng.integers(0, 2, n),
+                'Points For': rng.integers(0, 250, n), 'Points Against': rng.integers(0, 250, n),
+                'Kills': kills, 'Deaths': deaths,
+                'Non-Traded Kills': rng.binomial(kills, 0.7), 'Non-Traded Deaths': rng.binomial(deaths, 0.7),
+            })
+            if _is_parquet(path):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = writer or pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+
+_STREAMING_SCRIPT = """
+import json, time
+from cdl_predictor.streaming import aggregate_match_logs
+from cdl_predictor.utils import peak_rss_bytes
+start = time.perf_counter()
+team_data = aggregate_match_logs({path!r}, chunk_rows={chunk_rows})
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'cells': len(team_data), 'max_rss': peak_rss_bytes()}}))
+"""
+
+def benchmark_streaming_aggregation(row_counts=(250_000, 1_000_000, 4_000_000), chunk_rows=250_000, file_format='csv'):
+    """ Peak resident memory and throughput of aggregate_match_logs as the log grows. """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in row_counts:
+            path = os.path.join(tmp_dir, f'match_log_{n_rows}.{file_format}')
+            write_synthetic_match_log(path, n_rows)
+            script = _STREAMING_SCRIPT.format(path=path, chunk_rows=chunk_rows)
+            run = json.loads(run_python(script).stdout)
+            results.append({'Rows': n_rows, 'File (MB)': os.path.getsize(path) / 2**20, 'Cells': run['cells'],
+                            'Seconds': run['seconds'], 'Rows/s': n_rows / run['seconds'],
+                            'Peak RSS (MB)': run['max_rss'] / 2**20})
+            os.remove(path)
+    return pd.DataFrame(results)
@@ -0,0 +1,418 @@
+"""Encoding and Model Training
+
+This stage:
+* encodes the team, map and mode names as numbers with `LabelEncoder`
+* trains the Random Forest model on the matchup differentials
+* saves the matchups, the encoders and the model to files, and exports them as the model bundle the prediction stage loads
+
+I decided to split the data 70-30.
+70% of data is used for training while the other 30% is used for testing the model
+
+Every matchup is in the table once, with Team A the first of the two teams in the workbook, so the model only ever sees one order of each pair. `train --augment` trains it on both orders instead, with the rows generated from the per-team `TeamFeatureStore` (see `feature_store.py`). The test set is the same 30% of pairs, and the store replaces the pairwise table in the model bundle.
+"""
+
+import hashlib
+import os
+import json
+import pickle
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from .bundle import export_bundle
+from .columns import FEATURE_COLS, FILE_PATH, MATCHUP_FEATURES, MATCHUP_KEYS, TARGET_COL
+from .data import CACHE_DIR, load_workbook
+from .feature_store import FEATURE_STORE_PATH, TeamFeatureStore, fit_forest_from_store
+from .instrumentation import instrumented, stage
+from .matchups import (build_matchup_frame, changed_team_cells, compact_matchup_frame, make_synthetic_league,
+                       read_matchup_store, update_matchup_frame, write_matchup_store)
+from .utils import atomic_path, run_python
+
+# Example list of teams, maps, and modes
+TEAMS = ['Team A', 'Team B', 'TX', 'ATL', 'NY', 'MIN', 'LAG', 'CAR', 'TOR', 'VEG', 'SEA', 'LAT', 'MIA', 'BOS']
+MAPS = ['6 Star', 'Highrise', 'Karachi', 'Rio', 'Invasion', 'Terminal', 'Vista', 'Skidrow', 'Sub Base']
+MODES = ['Hardpoint', 'Control', 'SND']
+
+MODEL_PATH = 'random_forest_model.pkl'
+MATCHUP_DF_PATH = 'matchup_df.parquet'
+ENCODER_PATHS = ('team_encoder.pkl', 'map_encoder.pkl', 'mode_encoder.pkl')
+# The team data the matchups were built from, so later updates can tell what changed
+TRAINED_TEAM_DATA_PATH = 'combined_team_data.pkl'
+
+def fit_encoders(teams=TEAMS, maps=MAPS, modes=MODES):
+    """ Create and fit the team, map and mode label encoders. """
+    return LabelEncoder().fit(teams), LabelEncoder().fit(maps), LabelEncoder().fit(modes)
+
+def _training_encoders(team_data):
+    """ The encoders for the workbook's fixed lists, or fitted on team_data when it replaces the workbook. """
+    if team_data is None:
+        return fit_encoders()
+    # Aggregated match logs can cover other teams and maps than the workbook, e.g. earlier seasons or Challengers
+    return fit_encoders(team_data['Team'].unique(), team_data['Map'].unique(), team_data['Mode'].unique())
+
+def _encode_column(column, encoder):
+    """ Encoder codes for a column, read straight off a Categorical that already uses the encoder's vocabulary. """
+    if isinstance(column.dtype, pd.CategoricalDtype) and np.array_equal(column.cat.categories.to_numpy(dtype=str),
+                                                                         np.asarray(encoder.classes_, dtype=str)):
+        return column.cat.codes.to_numpy()
+    return encoder.transform(column)
+
+@instrumented()
+def encode_matchups(matchup_df, team_encoder, map_encoder, mode_encoder):
+    """ Return the model features (in FEATURE_COLS order) and the binary target for a matchup DataFrame. """
+    X = pd.DataFrame({
+        'Team1 Encoded': _encode_column(matchup_df['Team A'], team_encoder),
+        'Team2 Encoded': _encode_column(matchup_df['Team B'], team_encoder),
+        'Map Encoded': _encode_column(matchup_df['Map'], map_encoder),
+        'Mode Encoded': _encode_column(matchup_df['Mode'], mode_encoder),
+    })
+    for col in MATCHUP_FEATURES:
+        X[col] = matchup_df[col].to_numpy()
+    # Convert to binary outcome: 1 if Team A has a positive win % diff, else 0
+    y = (matchup_df[TARGET_COL].to_numpy() > 0).astype(int)
+    return X[FEATURE_COLS], y
+
+def split_training_data(X, y):
+    """ Split the data into training and testing sets (70% training, 30% testing). """
+    return train_test_split(X, y, test_size=0.3, random_state=42)
+
+def _atomic_pickle(obj, path):
+    """ Pickle obj to a temporary file next to path and swap it in with os.replace. """
+    with atomic_path(path) as tmp_path, open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f)
+
+def load_training_artifacts():
+    """ Load the saved matchups, encoders and sklearn model written by train_model. """
+    encoders = []
+    for path in ENCODER_PATHS:
+        with open(path, 'rb') as f:
+            encoders.append(pickle.load(f))
+    with open(MODEL_PATH, 'rb') as f:
+        model = pickle.load(f)
+    return read_matchup_store(MATCHUP_DF_PATH), encoders, model
+
+@instrumented(memory=True)
+def train_model(file_path=FILE_PATH, params=None, team_data=None, augment=False):
+    """ Build the matchups from the workbook, train the Random Forest model and save everything it needs.
+
+    team_data replaces the workbook's team sheets, e.g. stats aggregated from match logs by aggregate_match_logs.
+    The encoders are then fitted on its teams, maps and modes instead of TEAMS, MAPS and MODES.
+    With augment the training pairs are used in both orders and the feature store is saved for predictions.
+    """
+    combined_team_data = load_workbook(file_path)[1] if team_data is None else team_data
+
+    # Build the matchup differentials for every pair of teams on every map and mode, stored compactly
+    encoders = _training_encoders(team_data)
+    matchup_df = compact_matchup_frame(build_matchup_frame(combined_team_data), *encoders)
+    X, y = encode_matchups(matchup_df, *encoders)
+    X_train, X_test, y_train, y_test = split_training_data(X, y)
+
+    # Train RandomForest Classifier
+    rf_params = {'n_estimators': 100, 'random_state': 42, **(params or {})}
+    store = None
+    if augment:
+        # The store's pairs are in the same order as matchup_df, so splitting the pair ids gives the same test rows
+        store = TeamFeatureStore.from_team_data(combined_team_data)
+        pair_ids = np.arange(store.n_pairs)
+        train_ids = split_training_data(pair_ids, pair_ids)[0]
+        with stage('model_fit', memory=True):
+            rf_classifier = fit_forest_from_store(store, *encoders, pair_ids=train_ids, params=rf_params)
+        # Pairs level on Win % have no winner in either order, iter_training_batches leaves them out
+        rows_a, rows_b = store.pair_rows(train_ids)
+        print("Training rows (both orders):", 2 * np.count_nonzero(store.win_pct[rows_a] != store.win_pct[rows_b]))
+    else:
+        rf_classifier = RandomForestClassifier(**rf_params)
+        with stage('model_fit', memory=True):
+            rf_classifier.fit(X_train, y_train)
+    print("Training feature shape:", X_train.shape)
+    print("Test feature shape:", X_test.shape)
+    print("Accuracy:", accuracy_score(y_test, rf_classifier.predict(X_test)))
+
+    # Save the matchups, the encoders and the model to files, then export the bundle for predictions
+    with stage('save_artifacts'):
+        write_matchup_store(matchup_df, MATCHUP_DF_PATH)
+        _atomic_pickle(combined_team_data, TRAINED_TEAM_DATA_PATH)
+        for encoder, path in zip(encoders, ENCODER_PATHS):
+            _atomic_pickle(encoder, path)
+        _atomic_pickle(rf_classifier, MODEL_PATH)
+        if store is not None:
+            store.save(FEATURE_STORE_PATH)
+        elif os.path.exists(FEATURE_STORE_PATH):
+            # A store left by an earlier augmented training would replace the matchups in rebuilt bundles
+            os.remove(FEATURE_STORE_PATH)
+    export_bundle(rf_classifier, *encoders, matchup_df if store is None else store)
+    return rf_classifier
+
+"""# Hyperparameter search
+
+So far we have only tried `n_estimators=100` with the default tree settings. `search_hyperparameters` tries every combination in `PARAM_GRID` with 5-fold cross-validation, running the fits on all cores with `joblib`, and reports the accuracy and fit time of each configuration.
+
+* Every fitted fold model is memoized on disk with `joblib.Memory`, keyed by a hash of the fold's training data and the parameters. Re-running the search on the same data, e.g. after adding values to `PARAM_GRID` or after an interrupted run, only fits the (configuration, fold) pairs that aren't on disk yet
+* Each matchup is put in a fold based on a hash of its teams, map and mode, so a matchup is always scored in the same fold and CV results stay comparable as the data grows
+
+The cache doesn't help when the data changes. Adding a team sheet adds matchups to every fold, and a changed team sheet changes matchups in every fold, so every fold's training data is different and every (configuration, fold) pair is refit. Only a search on unchanged data reuses fits.
+"""
+
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 8, 16],
+    'max_features': ['sqrt', None],
+}
+
+def stable_fold_ids(matchup_df, n_splits=5):
+    """ Assign each matchup to a fold from a hash of its teams, map and mode.
+
+    A matchup keeps its fold as data is added, but the folds' training data still changes, see the note above.
+    """
+    keys = (matchup_df['Team A'].astype(str) + '|' + matchup_df['Team B'].astype(str) + '|'
+            + matchup_df['Map'].astype(str) + '|' + matchup_df['Mode'].astype(str))
+    return np.array([int(hashlib.md5(key.encode()).hexdigest(), 16) % n_splits for key in keys])
+
+def _fit_fold(X_train, y_train, params, random_state):
+    """ Fit one fold model and return it with its fit time. Memoized on disk by search_hyperparameters. """
+    start = time.perf_counter()
+    model = RandomForestClassifier(random_state=random_state, **params).fit(X_train, y_train)
+    return model, time.perf_counter() - start
+
+@instrumented(memory=True)
+def search_hyperparameters(X, y, fold_ids, param_grid=PARAM_GRID, n_jobs=-1, cache_dir=CACHE_DIR, random_state=42):
+    """ Cross-validate every configuration in param_grid in parallel and return one row per configuration.
+
+    'Config' is the configuration's position in ParameterGrid(param_grid), best configuration first. 'Cached Folds'
+    counts the folds reused from disk, which only happens when the fold's training data is exactly the same.
+    """
+    fit_fold = joblib.Memory(os.path.join(cache_dir, 'folds'), verbose=0).cache(_fit_fold)
+    X, y = np.asarray(X), np.asarray(y)
+    configurations = list(ParameterGrid(param_grid))
+    folds = [(fold_ids != fold, fold_ids == fold) for fold in np.unique(fold_ids)]
+    tasks = [(c, f) for c in range(len(configurations)) for f in range(len(folds))]
+
+    # Check which fold models are already on disk before starting the fits
+    cached = [fit_fold.check_call_in_cache(X[folds[f][0]], y[folds[f][0]], configurations[c], random_state) for c, f in tasks]
+    fitted = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(fit_fold)(X[folds[f][0]], y[folds[f][0]], configurations[c], random_state) for c, f in tasks)
+
+    rows = {}
+    for (c, f), (model, fit_time), was_cached in zip(tasks, fitted, cached):
+        row = rows.setdefault(c, {'Config': c, **configurations[c], 'Accuracies': [], 'Fit Time (s)': 0.0, 'Cached Folds': 0})
+        test_mask = folds[f][1]
+        row['Accuracies'].append(accuracy_score(y[test_mask], model.predict(X[test_mask])))
+        row['Fit Time (s)'] += fit_time
+        row['Cached Folds'] += was_cached
+
+    results = pd.DataFrame(rows.values())
+    results['CV Accuracy'] = results['Accuracies'].apply(np.mean)
+    results['CV Std'] = results['Accuracies'].apply(np.std)
+    return results.drop(columns='Accuracies').sort_values('CV Accuracy', ascending=False, ignore_index=True)
+
+@instrumented()
+def tune_model(file_path=FILE_PATH, param_grid=PARAM_GRID, n_jobs=-1, team_data=None, augment=False):
+    """ Run the hyperparameter search, then train and save the model with the best configuration.
+
+    The search scores the configurations on the matchups as they are, augment only applies to the final training.
+    """
+    combined_team_data = load_workbook(file_path)[1] if team_data is None else team_data
+    matchup_df = build_matchup_frame(combined_team_data)
+    X, y = encode_matchups(matchup_df, *_training_encoders(team_data))
+    results = search_hyperparameters(X, y, stable_fold_ids(matchup_df), param_grid, n_jobs=n_jobs)
+    print(results.to_string())
+
+    best_params = ParameterGrid(param_grid)[results.loc[0, 'Config']]
+    print("Best parameters:", best_params)
+    return train_model(file_path, best_params, team_data, augment)
+
+"""# Incremental updates
+
+Every week new results are added to the workbook. Rather than re-running everything above, `update_model` only redoes what the new data touches:
+
+1. The new workbook is compared with the team data the current model was trained on (saved as `combined_team_data.pkl`) to find the team/map/mode cells that were added, removed or changed
+2. Only the matchup rows that involve one of those cells are recomputed, in place, the rest of `matchup_df` is kept as is. Every row stays where it was, so the 70/30 split is the same one the model was trained with and `evaluate_model` never scores the kept trees on rows they were trained on
+3. Instead of refitting all the trees, the forest is grown with `warm_start`: a few new trees are fitted on the updated data and the existing trees are kept. Once the forest reaches `max_trees`, or when matchups were added or removed (which moves the split), it is retrained from scratch with the same parameters it was trained with, e.g. the ones `train --search` picked, and its original number of trees
+4. The new files are written next to the old ones and swapped in with `os.replace`, so a prediction running at the same time never sees a half-written model
+
+A model trained with `train --augment` is retrained in full instead, with its parameters, since its trees were grown from the feature store rather than from `matchup_df`.
+"""
+
+def _retrain_params(model):
+    """ The parameters model was trained with, with the number of trees it had before any incremental update. """
+    params = model.get_params()
+    params.update(n_estimators=getattr(model, 'base_n_estimators_', model.n_estimators), warm_start=False)
+    return params
+
+@instrumented(memory=True)
+def incremental_update(model, team_encoder, map_encoder, mode_encoder, matchup_df, old_team_data, new_team_data,
+                       new_trees=20, max_trees=300):
+    """ Update matchup_df and the model for new team data. Returns (model, matchup_df, changed_cells). """
+    changed_cells = changed_team_cells(old_team_data, new_team_data)
+    if changed_cells.empty:
+        return model, matchup_df, changed_cells
+
+    old_keys = matchup_df[MATCHUP_KEYS].astype(str).to_numpy()
+    matchup_df = update_matchup_frame(matchup_df, new_team_data, changed_cells)
+    try:
+        X_new, y_new = encode_matchups(matchup_df, team_encoder, map_encoder, mode_encoder)
+    except ValueError as e:
+        # The encoders are fitted on a fixed list, a new team or map changes every code so a full retrain is needed
+        raise ValueError(f"New data has a team, map or mode the encoders don't know, re-run the full training: {e}") from e
+    X_train_new, _, y_train_new, _ = split_training_data(X_new, y_new)
+    # The split is by row position, so it only stays the same while the matchups do. Otherwise the kept trees have
+    # seen rows that are now in the test set
+    same_split = np.array_equal(old_keys, matchup_df[MATCHUP_KEYS].astype(str).to_numpy())
+
+    if not same_split or model.n_estimators + new_trees > max_trees:
+        model = clone(model).set_params(**_retrain_params(model)).fit(X_train_new, y_train_new)
+    else:
+        # warm_start keeps the fitted trees and only fits the extra ones. Remember the starting size for the next retrain
+        model.base_n_estimators_ = getattr(model, 'base_n_estimators_', model.n_estimators)
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + new_trees)
+        model.fit(X_train_new, y_train_new)
+        model.set_params(warm_start=False)
+    return model, matchup_df, changed_cells
+
+@instrumented()
+def update_model(file_path=FILE_PATH, new_trees=20, max_trees=300):
+    """ Apply the changes in the workbook to the saved matchups and model, only redoing what changed. """
+    matchup_df, (team_encoder, map_encoder, mode_encoder), model = load_training_artifacts()
+    if os.path.exists(FEATURE_STORE_PATH):
+        print("The model was trained with --augment, retraining it in full")
+        return train_model(file_path, _retrain_params(model), augment=True)
+    old_team_data = pd.read_pickle(TRAINED_TEAM_DATA_PATH)
+    _, new_team_data = load_workbook(file_path)
+
+    model, matchup_df, changed_cells = incremental_update(model, team_encoder, map_encoder, mode_encoder, matchup_df,
+                                                          old_team_data, new_team_data, new_trees, max_trees)
+    if changed_cells.empty:
+        print("No changes since the model was last trained")
+        return model
+
+    # Swap the matchups in before the model, then export the bundle the prediction stage loads
+    matchup_df = compact_matchup_frame(matchup_df, team_encoder, map_encoder, mode_encoder)
+    write_matchup_store(matchup_df, MATCHUP_DF_PATH)
+    _atomic_pickle(model, MODEL_PATH)
+    _atomic_pickle(new_team_data, TRAINED_TEAM_DATA_PATH)
+    export_bundle(model, team_encoder, map_encoder, mode_encoder, matchup_df)
+    print(f"Updated {len(changed_cells)} team cells, the model now has {model.n_estimators} trees")
+    return model
+
+"""To see how much time this saves we replay a synthetic 20 week season: every week four teams play, and their stats change on five map and mode cells each. Each week is applied both as an incremental update and as a full rebuild and retrain."""
+
+def _play_synthetic_week(team_data, rng, teams_per_week=4, cells_per_team=5):
+    """ Return a copy of team_data with a few teams' stats nudged on a few cells, like one week of results. """
+    team_data = team_data.copy()
+    for team in rng.choice(team_data['Team'].unique(), teams_per_week, replace=False):
+        rows = rng.choice(np.flatnonzero(team_data['Team'].to_numpy() == team), cells_per_team, replace=False)
+        for stat, scale in (('Win %', 0.05), ('K/D', 0.02), ('Avg Point Diff', 2.0), ('NTK %', 0.01), ('NTD %', 0.01)):
+            team_data.loc[rows, stat] += rng.normal(0, scale, cells_per_team)
+    return team_data
+
+def benchmark_incremental_update(n_teams=12, n_weeks=20, new_trees=5, seed=0):
+    """ Compare total time of weekly incremental updates against full rebuilds over a synthetic season. """
+    rng = np.random.default_rng(seed)
+    team_data = make_synthetic_league(n_teams, seed=seed)
+    teams_encoder = LabelEncoder().fit(team_data['Team'])
+    maps_encoder = LabelEncoder().fit(team_data['Map'])
+    modes_encoder = LabelEncoder().fit(team_data['Mode'])
+    encoders = (teams_encoder, maps_encoder, modes_encoder)
+
+    matchups = build_matchup_frame(team_data)
+    X_start, y_start = encode_matchups(matchups, *encoders)
+    model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_start, y_start)
+
+    incremental_time = full_time = 0.0
+    for _ in range(n_weeks):
+        new_team_data = _play_synthetic_week(team_data, rng)
+
+        start = time.perf_counter()
+        model, matchups, _ = incremental_update(model, *encoders, matchups, team_data, new_team_data, new_trees=new_trees)
+        incremental_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        X_full, y_full = encode_matchups(build_matchup_frame(new_team_data), *encoders)
+        X_full_train, _, y_full_train, _ = split_training_data(X_full, y_full)
+        RandomForestClassifier(n_estimators=100, random_state=42).fit(X_full_train, y_full_train)
+        full_time += time.perf_counter() - start
+
+        team_data = new_team_data
+    return {'Weeks': n_weeks, 'Incremental (s)': incremental_time, 'Full retrain (s)': full_time,
+            'Speedup': full_time / incremental_time}
+
+"""# Compact matchup store
+
+`train_model` used to save `matchup_df` with `to_pickle`, with the team, map and mode names as Python strings and every differential as float64. It now keeps it as the compact frame from `compact_matchup_frame` and writes it as a zstd-compressed Parquet file.
+
+`benchmark_matchup_store` compares the two on synthetic leagues of growing size. The legacy frame also carries the four int64 encoded columns the notebook used to add to it. For each size it reports the in-memory size, the file size, and the memory taken by loading the file in a fresh interpreter. It also trains the same forest on the features from both frames and checks the predictions are identical, so the accuracy is exactly the same.
+"""
+
+_STORE_LOAD_SCRIPT = """
+import io, json, pandas as pd, pyarrow as pa
+
+from cdl_predictor.utils import current_rss_bytes as rss
+
+# Read a tiny Parquet file first so the reader's one-off setup isn't counted as the store's memory
+buffer = io.BytesIO()
+pd.DataFrame({{'a': pd.Categorical(['x'])}}).to_parquet(buffer)
+pd.read_parquet(buffer)
+before = rss()
+matchup_df = pd.read_parquet({path!r}) if {path!r}.endswith('.parquet') else pd.read_pickle({path!r})
+pa.default_memory_pool().release_unused()
+print(json.dumps({{'rss': rss() - before}}))
+"""
+
+def _legacy_matchup_frame(matchup_df, team_encoder, map_encoder, mode_encoder):
+    """ matchup_df the way the notebook kept it: string keys, float64 differentials and int64 encoded columns. """
+    legacy = matchup_df.copy()
+    legacy['Team1 Encoded'] = team_encoder.transform(legacy['Team A']).astype(np.int64)
+    legacy['Team2 Encoded'] = team_encoder.transform(legacy['Team B']).astype(np.int64)
+    legacy['Map Encoded'] = map_encoder.transform(legacy['Map']).astype(np.int64)
+    legacy['Mode Encoded'] = mode_encoder.transform(legacy['Mode']).astype(np.int64)
+    return legacy
+
+def _store_load_rss(path):
+    """ Resident memory taken by loading path in a fresh interpreter, or None where /proc isn't available. """
+    run = run_python(_STORE_LOAD_SCRIPT.format(path=path), check=False)
+    return json.loads(run.stdout)['rss'] if run.returncode == 0 else None
+
+def benchmark_matchup_store(team_counts=(12, 100, 300), seed=0):
+    """ Memory and file size of the legacy pickled matchup_df against the compact store, and the model accuracy of both. """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_teams in team_counts:
+            team_data = make_synthetic_league(n_teams, seed=seed)
+            encoders = (LabelEncoder().fit(team_data['Team']), LabelEncoder().fit(team_data['Map']),
+                        LabelEncoder().fit(team_data['Mode']))
+            matchup_df = build_matchup_frame(team_data)
+            frames = {'Legacy': _legacy_matchup_frame(matchup_df, *encoders),
+                      'Compact': compact_matchup_frame(matchup_df, *encoders)}
+            paths = {'Legacy': os.path.join(tmp_dir, f'matchups_{n_teams}.pkl'),
+                     'Compact': os.path.join(tmp_dir, f'matchups_{n_teams}.parquet')}
+            frames['Legacy'].to_pickle(paths['Legacy'])
+            write_matchup_store(frames['Compact'], paths['Compact'])
+            pd.testing.assert_frame_equal(read_matchup_store(paths['Compact']), frames['Compact'])
+
+            row = {'Teams': n_teams, 'Rows': len(matchup_df)}
+            for label in ('Legacy', 'Compact'):
+                rss = _store_load_rss(paths[label])
+                row[f'{label} memory (MB)'] = frames[label].memory_usage(deep=True).sum() / 2**20
+                row[f'{label} file (MB)'] = os.path.getsize(paths[label]) / 2**20
+                row[f'{label} load RSS (MB)'] = rss / 2**20 if rss is not None else float('nan')
+
+            # The same forest trained on either frame should make exactly the same predictions
+            predictions = {}
+            for label, frame in frames.items():
+                X, y = encode_matchups(frame, *encoders)
+                X_train, X_test, y_train, y_test = split_training_data(X, y)
+                model = RandomForestClassifier(n_estimators=50, random_state=42, n_jobs=-1).fit(X_train, y_train)
+                predictions[label] = model.predict(X_test)
+                row[f'{label} accuracy'] = accuracy_score(y_test, predictions[label])
+            if not np.array_equal(predictions['Legacy'], predictions['Compact']):
+                raise AssertionError(f"The compact store changed the model's predictions with {n_teams} teams")
+            results.append(row)
+    return pd.DataFrame(results)
@@ -0,0 +1,56 @@
+"""Shared helpers
+
+Small helpers the stages share. This module only imports the standard library, so it can be used from the prediction path and from the scripts the benchmarks run in a fresh interpreter without changing what they measure.
+
+* `atomic_path` gives a temporary file next to the destination and swaps it in with `os.replace` once it is written, so an interrupted run or a concurrent reader never sees a half-written file
+* `run_python` runs a script in a fresh interpreter that can import `cdl_predictor`
+* `current_rss_bytes` and `peak_rss_bytes` read the resident memory of the process
+"""
+
+import contextlib
+import os
+import subprocess
+import sys
+import threading
+
+# The folder the cdl_predictor package is in, for running it in a fresh interpreter
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@contextlib.contextmanager
+def atomic_path(path, suffix=''):
+    """ Yield a temporary path next to path and swap it in with os.replace once the block finishes.
+
+    The name is unique to the process and thread, so two writers never share a temporary file. It ends in suffix,
+    for writers that add an extension otherwise, e.g. '.npz' for np.savez. If the block fails, the file is removed.
+    """
+    tmp_path = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp{suffix}'
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def run_python(script, check=True):
+    """ Run script with `python -c` in a fresh interpreter that can import cdl_predictor, and return the CompletedProcess. """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PACKAGE_ROOT, os.environ.get('PYTHONPATH')])))
+    return subprocess.run([sys.executable, '-c', script], env=env, check=check, capture_output=True, text=True)
+
+def current_rss_bytes():
+    """ Current resident memory of this process, or None where /proc isn't available. """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def peak_rss_bytes():
+    """ Peak resident memory of this process. """
+    # ru_maxrss carries over the parent's peak from before exec on Linux, VmHWM is this process' own
+    try:
+        with open('/proc/self/status') as f:
+            return int(next(line for line in f if line.startswith('VmHWM')).split()[1]) * 1024
+    except (OSError, StopIteration):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from cdl_predictor.matchups import build_matchup_frame, make_synthetic_league
+from cdl_predictor.training import encode_matchups, fit_encoders
+
+@pytest.fixture(scope='session')
+def league():
+    """ A 12-team synthetic league on the CDL maps and modes. """
+    return make_synthetic_league(12, seed=0)
+
+@pytest.fixture(scope='session')
+def matchup_df(league):
+    return build_matchup_frame(league)
+
+@pytest.fixture(scope='session')
+def encoders(league):
+    return fit_encoders(league['Team'].unique(), league['Map'].unique(), league['Mode'].unique())
+
+@pytest.fixture(scope='session')
+def model_and_X(matchup_df, encoders):
+    """ A small depth-limited forest fitted on the league's matchups, with its feature matrix. """
+    X, y = encode_matchups(matchup_df, *encoders)
+    X = X.to_numpy(dtype=np.float64)
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    return model, X
@@ -0,0 +1,11 @@
+import pytest
+
+from cdl_predictor.benchmarks import HEAVY_MODULES, check_import_time, measure_import_time
+
+def test_import_time_within_budget():
+    assert check_import_time()
+
+@pytest.mark.parametrize('module', ['cdl_predictor.cli', 'cdl_predictor.bundle', 'cdl_predictor.server'])
+def test_prediction_path_imports_no_heavy_modules(module):
+    _, imported = measure_import_time(module, repeats=1)
+    assert not [name for name in HEAVY_MODULES if name in imported]
@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+import pytest
+
+from cdl_predictor.bundle import BUNDLE_SCHEMA_VERSION, export_bundle, load_bundle
+from cdl_predictor.prediction import MatchupIndex
+
+@pytest.fixture
+def bundle_dir(tmp_path, matchup_df, encoders, model_and_X):
+    export_bundle(model_and_X[0], *encoders, matchup_df, bundle_dir=str(tmp_path))
+    return str(tmp_path)
+
+def test_bundle_round_trip(bundle_dir, matchup_df, encoders, model_and_X):
+    model, X = model_and_X
+    flat_forest, team_encoder, map_encoder, mode_encoder, matchup_index = load_bundle(bundle_dir)
+
+    assert np.array_equal(flat_forest.predict_proba(X), model.predict_proba(X))
+    for loaded, fitted in zip((team_encoder, map_encoder, mode_encoder), encoders):
+        assert np.array_equal(loaded.transform(fitted.classes_), fitted.transform(fitted.classes_))
+
+    # The lookup keys are loaded as saved, not rebuilt, and give the same rows as a fresh index
+    assert isinstance(matchup_index.keys.base, np.memmap)
+    fresh = MatchupIndex.from_frame(matchup_df)
+    rows = matchup_df.sample(100, random_state=0)
+    for a, b, map_name, mode in zip(rows['Team A'], rows['Team B'], rows['Map'], rows['Mode']):
+        for team1, team2 in ((a, b), (b, a)):
+            assert np.array_equal(matchup_index.lookup(team1, team2, map_name, mode), fresh.lookup(team1, team2, map_name, mode))
+    assert matchup_index.lookup('T000', 'Unknown', 'Rio', 'SND') is None
+
+def test_bundle_rejects_other_schema_version(bundle_dir):
+    manifest_path = f'{bundle_dir}/manifest.json'
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['schema_version'] = BUNDLE_SCHEMA_VERSION - 1
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+    with pytest.raises(ValueError, match='version'):
+        load_bundle(bundle_dir)
+
+def test_bundle_rejects_arrays_that_dont_match_the_manifest(bundle_dir):
+    manifest_path = f'{bundle_dir}/manifest.json'
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['arrays']['matchup_keys']['shape'] = [1]
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+    with pytest.raises(ValueError, match='does not match'):
+        load_bundle(bundle_dir)
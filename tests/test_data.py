@@ -0,0 +1,37 @@
+import hashlib
+import json
+
+import pandas as pd
+import pytest
+
+from cdl_predictor.data import _workbook_hash, read_workbook_sheets
+
+def test_workbook_hash_recovers_from_truncated_index(tmp_path):
+    workbook = tmp_path / 'stats.xlsx'
+    workbook.write_bytes(b'workbook bytes')
+    index_path = tmp_path / 'index.json'
+    index_path.write_text('{"/some/path": {"mtime": 1')
+
+    assert _workbook_hash(str(workbook), str(tmp_path)) == hashlib.sha256(b'workbook bytes').hexdigest()
+    assert str(workbook) in json.loads(index_path.read_text())
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == '.tmp'] == []
+
+def _write_workbook(path, sheets):
+    with pd.ExcelWriter(path) as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+
+def test_team_stats_sheet_falls_back_to_first_other_sheet(tmp_path):
+    path = str(tmp_path / 'stats.xlsx')
+    team_sheet = pd.DataFrame({'Map': ['Rio'], 'Mode': ['SND'], 'Win %': [0.5]})
+    _write_workbook(path, {'Overview': pd.DataFrame({'Team': ['TX'], 'Wins': [3]}), 'TX': team_sheet, 'ATL': team_sheet})
+
+    team_stats, combined_team_data = read_workbook_sheets(path)
+    assert list(team_stats.columns) == ['Team', 'Wins']
+    assert combined_team_data['Team'].tolist() == ['TX', 'ATL']
+
+def test_workbook_without_team_stats_sheet_raises(tmp_path):
+    path = str(tmp_path / 'stats.xlsx')
+    _write_workbook(path, {'TX': pd.DataFrame({'Map': ['Rio'], 'Mode': ['SND'], 'Win %': [0.5]})})
+    with pytest.raises(ValueError, match='Team Stats'):
+        read_workbook_sheets(path)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from cdl_predictor.bundle import export_bundle, load_bundle
+from cdl_predictor.feature_store import TeamFeatureStore, iter_training_batches
+from cdl_predictor.prediction import MatchupIndex
+from cdl_predictor.training import encode_matchups
+
+def test_store_lookup_matches_index(league, matchup_df):
+    store = TeamFeatureStore.from_team_data(league)
+    matchup_index = MatchupIndex.from_frame(matchup_df)
+    rows = matchup_df.sample(200, random_state=0)
+    for a, b, map_name, mode in zip(rows['Team A'], rows['Team B'], rows['Map'], rows['Mode']):
+        for team1, team2 in ((a, b), (b, a)):
+            assert np.array_equal(store.lookup(team1, team2, map_name, mode), matchup_index.lookup(team1, team2, map_name, mode))
+    assert store.lookup('T000', 'Unknown', 'Rio', 'SND') is None
+
+def test_unaugmented_batches_match_encoded_matchups(league, matchup_df, encoders):
+    store = TeamFeatureStore.from_team_data(league)
+    batches = list(iter_training_batches(store, *encoders, batch_rows=500, augment=False))
+    assert len(batches) > 1
+    X_expected, y_expected = encode_matchups(matchup_df, *encoders)
+    pd.testing.assert_frame_equal(pd.concat([X for X, _ in batches], ignore_index=True), X_expected, check_dtype=False)
+    assert np.array_equal(np.concatenate([y for _, y in batches]), y_expected)
+
+def test_augmented_batches_hold_both_orders_without_ties(league, encoders):
+    store = TeamFeatureStore.from_team_data(league)
+    X, y = next(iter_training_batches(store, *encoders, batch_rows=10 * store.n_pairs))
+    rows_a, rows_b = store.pair_rows(np.arange(store.n_pairs))
+    untied = np.count_nonzero(store.win_pct[rows_a] != store.win_pct[rows_b])
+    assert len(X) == 2 * untied
+    assert y.sum() == untied
+
+def test_store_save_load_and_bundle(tmp_path, league, encoders, model_and_X):
+    store = TeamFeatureStore.from_team_data(league)
+    store.save(str(tmp_path / 'feature_store.npz'))
+    loaded = TeamFeatureStore.load(str(tmp_path / 'feature_store.npz'))
+    assert np.array_equal(loaded.features, store.features) and loaded.cells == store.cells
+
+    export_bundle(model_and_X[0], *encoders, store, bundle_dir=str(tmp_path / 'bundle'))
+    bundled = load_bundle(str(tmp_path / 'bundle'))[4]
+    assert isinstance(bundled, TeamFeatureStore)
+    assert np.array_equal(bundled.lookup('T000', 'T001', 'Rio', 'SND'), store.lookup('T000', 'T001', 'Rio', 'SND'))
@@ -0,0 +1,14 @@
+import numpy as np
+
+from cdl_predictor.forest import FlatForest
+
+def test_flat_forest_matches_sklearn(model_and_X):
+    model, X = model_and_X
+    flat_forest = FlatForest.from_sklearn(model)
+    assert np.array_equal(flat_forest.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(flat_forest.predict(X), model.predict(X))
+
+def test_flat_forest_single_row(model_and_X):
+    model, X = model_and_X
+    row = X[:1]
+    assert np.array_equal(FlatForest.from_sklearn(model).predict_proba(row), model.predict_proba(row))
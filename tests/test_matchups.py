@@ -0,0 +1,12 @@
+import pandas as pd
+
+from cdl_predictor.matchups import _build_matchup_frame_loop, build_matchup_frame, make_synthetic_league
+
+def test_vectorized_builder_matches_loop(league, matchup_df):
+    pd.testing.assert_frame_equal(matchup_df, _build_matchup_frame_loop(league))
+
+def test_vectorized_builder_matches_loop_with_missing_cells():
+    # Teams without data on some maps and modes, and a duplicated row that only counts once
+    league = make_synthetic_league(12, seed=1).sample(frac=0.8, random_state=1)
+    league = pd.concat([league, league.iloc[:3]], ignore_index=True)
+    pd.testing.assert_frame_equal(build_matchup_frame(league), _build_matchup_frame_loop(league))
@@ -0,0 +1,17 @@
+import numpy as np
+
+from cdl_predictor.prediction import MatchupIndex, _get_matchup_features_scan
+
+def test_index_lookup_matches_scan(matchup_df):
+    matchup_index = MatchupIndex.from_frame(matchup_df)
+    rows = matchup_df.sample(200, random_state=0)
+    for a, b, map_name, mode in zip(rows['Team A'], rows['Team B'], rows['Map'], rows['Mode']):
+        # Both orientations, the reversed one negates the differentials
+        for team1, team2 in ((a, b), (b, a)):
+            expected = _get_matchup_features_scan(team1, team2, map_name, mode, matchup_df)
+            assert np.array_equal(matchup_index.lookup(team1, team2, map_name, mode), expected)
+
+def test_index_lookup_missing_matchup(matchup_df):
+    matchup_index = MatchupIndex.from_frame(matchup_df)
+    assert _get_matchup_features_scan('T000', 'T001', 'Nowhere', 'Hardpoint', matchup_df) is None
+    assert matchup_index.lookup('T000', 'T001', 'Nowhere', 'Hardpoint') is None
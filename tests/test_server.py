@@ -0,0 +1,50 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from cdl_predictor.forest import FlatForest
+from cdl_predictor.prediction import MatchupIndex
+from cdl_predictor.server import make_prediction_server
+
+@pytest.fixture(scope='module')
+def server_port(encoders, matchup_df, model_and_X):
+    resources = (FlatForest.from_sklearn(model_and_X[0]), *encoders, MatchupIndex.from_frame(matchup_df))
+    server = make_prediction_server(resources, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+def _post(port, body):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request('POST', '/predict', body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    status, data = response.status, json.loads(response.read())
+    connection.close()
+    return status, data
+
+def test_predict_series(server_port, capsys):
+    series = {'team1': 'T000', 'team2': 'T001', 'maps': ['Rio', 'Karachi', 'Highrise', 'Vista', 'Invasion']}
+    status, body = _post(server_port, json.dumps(series))
+    assert status == 200
+    assert sum(body['map_wins'].values()) <= 5 and max(body['map_wins'].values()) == 3
+    assert [m['played'] for m in body['maps']].count(True) == sum(body['map_wins'].values())
+    assert 0 <= body['series_win_probability'] <= 1
+
+    # Maps without data come back without a winner, and nothing is printed on the server
+    series['team2'] = 'Unknown'
+    status, body = _post(server_port, json.dumps([series]))
+    assert status == 200
+    assert body[0]['map_wins'] == {'T000': 0, 'Unknown': 0}
+    assert body[0]['series_win_probability'] is None
+    assert capsys.readouterr().out == ''
+
+@pytest.mark.parametrize('body', ['5', '[1]', 'null', '{"team1": "T000", "team2": "T001"}',
+                                  '{"team1": "T000", "maps": ["Rio", "Rio", "Rio", "Rio", "Rio"]}', 'not json'])
+def test_bad_requests(server_port, body):
+    status, response = _post(server_port, body)
+    assert status == 400
+    assert 'error' in response
@@ -0,0 +1,41 @@
+import numpy as np
+
+from cdl_predictor.cli import main
+from cdl_predictor.columns import SERIES_MODES
+from cdl_predictor.forest import FlatForest
+from cdl_predictor.matchups import build_matchup_frame
+from cdl_predictor.prediction import MatchupIndex
+from cdl_predictor.simulation import exact_series_distribution, explore_vetoes, simulate_series
+
+def test_explore_vetoes_only_ranks_cells_with_data(league, encoders, model_and_X):
+    # T001 has no data on the first two Hardpoint maps
+    league = league[~((league['Team'] == 'T001') & league['Map'].isin(['6 Star', 'Highrise']) & (league['Mode'] == 'Hardpoint'))]
+    matchup_index = MatchupIndex.from_frame(build_matchup_frame(league))
+    model = FlatForest.from_sklearn(model_and_X[0])
+
+    ranking = explore_vetoes(model, *encoders, matchup_index, 'T000', 'T001')
+    assert (ranking['Maps Without Data'] == 0).all()
+    assert not ranking.filter(like='(Hardpoint)').isin(['6 Star']).any().any()
+
+    with_missing = explore_vetoes(model, *encoders, matchup_index, 'T000', 'T001', include_missing=True)
+    assert len(with_missing) > len(ranking)
+    # Every assignment the model predicted in full comes before the ones with coin flips
+    assert np.all(np.diff(with_missing['Maps Without Data'].to_numpy()) >= 0)
+    np.testing.assert_array_equal(with_missing['Series Win'].to_numpy()[:len(ranking)], ranking['Series Win'].to_numpy())
+
+def test_simulated_series_matches_exact_distribution():
+    map_probabilities = np.random.default_rng(0).uniform(0.2, 0.8, (3, 5))
+    map_probabilities[1, 2] = np.nan
+    exact = exact_series_distribution(map_probabilities)
+    np.testing.assert_allclose(exact.sum(axis=1), 1.0)
+    np.testing.assert_allclose(simulate_series(map_probabilities, 200_000, seed=0), exact, atol=0.005)
+
+def test_main_without_data_prints_no_odds(monkeypatch, capsys, encoders, matchup_df, model_and_X):
+    resources = (FlatForest.from_sklearn(model_and_X[0]), *encoders, MatchupIndex.from_frame(matchup_df))
+    monkeypatch.setattr('cdl_predictor.bundle.load_resources', lambda: resources)
+    monkeypatch.setattr('cdl_predictor.prediction.get_user_input',
+                        lambda: ('T000', 'Unknown', ['Rio', 'Rio', 'Rio', 'Highrise', 'Vista'], list(SERIES_MODES)))
+    main()
+    output = capsys.readouterr().out
+    assert 'Not enough data' in output
+    assert 'Series Win Probability' not in output
@@ -0,0 +1,12 @@
+import pandas as pd
+import pytest
+
+from cdl_predictor.streaming import MatchLogAggregator, aggregate_match_logs, iter_match_log_chunks, write_synthetic_match_log
+
+@pytest.mark.parametrize('file_format', ['csv', 'parquet'])
+def test_chunked_totals_equal_whole_file_totals(tmp_path, file_format):
+    path = str(tmp_path / f'match_log.{file_format}')
+    write_synthetic_match_log(path, 20_000, chunk_rows=6_000)
+    whole = MatchLogAggregator()
+    whole.update(next(iter_match_log_chunks(path, 20_000)))
+    pd.testing.assert_frame_equal(aggregate_match_logs(path, chunk_rows=3_000), whole.team_data())
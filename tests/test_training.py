@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from cdl_predictor.columns import MATCHUP_KEYS
+from cdl_predictor.matchups import build_matchup_frame
+from cdl_predictor.training import _play_synthetic_week, encode_matchups, incremental_update, split_training_data
+
+SEARCHED_PARAMS = {'n_estimators': 10, 'max_depth': 3, 'max_features': None, 'random_state': 0}
+
+def _fit(matchup_df, encoders, **params):
+    X, y = encode_matchups(matchup_df, *encoders)
+    X_train, _, y_train, _ = split_training_data(X, y)
+    return RandomForestClassifier(**params).fit(X_train, y_train)
+
+def test_incremental_rows_equal_full_rebuild(league, matchup_df, encoders):
+    rng = np.random.default_rng(0)
+    model = _fit(matchup_df, encoders, n_estimators=5, max_depth=4, random_state=0)
+    team_data, matchups = league, matchup_df
+    for _ in range(3):
+        new_team_data = _play_synthetic_week(team_data, rng)
+        model, matchups, _ = incremental_update(model, *encoders, matchups, team_data, new_team_data, new_trees=2)
+        team_data = new_team_data
+
+    rebuilt = build_matchup_frame(team_data).sort_values(MATCHUP_KEYS, ignore_index=True)
+    pd.testing.assert_frame_equal(matchups.sort_values(MATCHUP_KEYS, ignore_index=True), rebuilt)
+    assert model.n_estimators == 11
+
+def test_retrain_keeps_hyperparameters_when_a_cell_is_removed(league, matchup_df, encoders):
+    model = _fit(matchup_df, encoders, **SEARCHED_PARAMS)
+    new_team_data = league.iloc[1:].reset_index(drop=True)
+
+    updated, _, changed = incremental_update(model, *encoders, matchup_df, league, new_team_data)
+    assert not changed.empty
+    assert updated is not model
+    assert updated.get_params() == model.get_params()
+
+def test_retrain_restores_the_original_tree_count(league, matchup_df, encoders):
+    model = _fit(matchup_df, encoders, **SEARCHED_PARAMS)
+    rng = np.random.default_rng(1)
+    grown_data = _play_synthetic_week(league, rng)
+    model, matchups, _ = incremental_update(model, *encoders, matchup_df, league, grown_data, new_trees=5)
+    assert model.n_estimators == 15
+
+    # Growing past max_trees retrains from scratch with the searched configuration
+    model, _, _ = incremental_update(model, *encoders, matchups, grown_data, _play_synthetic_week(grown_data, rng),
+                                     new_trees=5, max_trees=18)
+    assert model.get_params() == RandomForestClassifier(**SEARCHED_PARAMS).get_params()
+    assert len(model.estimators_) == 10
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from cdl_predictor.utils import atomic_path
+
+def test_atomic_path_swaps_in_the_written_file(tmp_path):
+    path = str(tmp_path / 'out.json')
+    with atomic_path(path) as tmp_file:
+        with open(tmp_file, 'w') as f:
+            f.write('new')
+        assert not os.path.exists(path)
+    assert open(path).read() == 'new'
+    assert os.listdir(tmp_path) == ['out.json']
+
+def test_atomic_path_keeps_the_old_file_on_error(tmp_path):
+    path = tmp_path / 'out.json'
+    path.write_text('old')
+    with pytest.raises(RuntimeError):
+        with atomic_path(str(path)) as tmp_file:
+            with open(tmp_file, 'w') as f:
+                f.write('half')
+            raise RuntimeError
+    assert path.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['out.json']